@@ -9,7 +9,7 @@ import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Iterable, Iterator, Optional
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple
 
 from rich.console import Console
 
@@ -45,6 +45,7 @@ class DeviceController:
         self.serial = f"{self.adb.host}:{self.device_port}"
         self._adb_path = str(Path(self.adb.executable))
         self._debug_capture_callback: Callable[[str], None] | None = None
+        self._pending_sleep = 0.0
 
     def _run(self, args: Iterable[str], timeout: Optional[float] = None) -> None:
         cmd = [self._adb_path, "-s", self.serial, *args]
@@ -89,13 +90,37 @@ class DeviceController:
 
     def tap(self, coord: Coord, label: str = "") -> None:
         """Simula un toque en la coordenada indicada, registrándolo para debug."""
+        self.flush_sleep()
         suffix = f" ({label})" if label else ""
         self._record_action_debug(f"tap-{label or coord}")
         self.console.log(f"Tap en {coord}{suffix}")
         self._run(["shell", "input", "tap", str(coord[0]), str(coord[1])])
 
+    def tap_sequence(self, taps: Sequence[Tuple[Coord, float]], label: str = "") -> None:
+        """Encadena varios toques en una sola invocación de ``adb shell``.
+
+        Cada elemento es ``(coord, pausa_en_segundos)``; las pausas se ejecutan
+        dentro del dispositivo con ``sleep``, evitando un proceso ADB por toque.
+        """
+        if not taps:
+            return
+        self.flush_sleep()
+        suffix = f" ({label})" if label else ""
+        self._record_action_debug(f"tap-seq-{label or len(taps)}")
+        self.console.log(f"Secuencia de {len(taps)} taps{suffix}")
+        parts = []
+        total_delay = 0.0
+        for coord, delay in taps:
+            parts.append(f"input tap {coord[0]} {coord[1]}")
+            if delay > 0:
+                parts.append(f"sleep {delay:g}")
+                total_delay += delay
+        script = "; ".join(parts)
+        self._run(["shell", script], timeout=self.adb.command_timeout + total_delay)
+
     def swipe(self, start: Coord, end: Coord, duration_ms: int = 300, label: str = "") -> None:
         """Arrastra entre dos puntos en pantalla usando ``input swipe``."""
+        self.flush_sleep()
         suffix = f" ({label})" if label else ""
         self._record_action_debug(f"swipe-{label or start}")
         self.console.log(f"Swipe {start}->{end}{suffix}")
@@ -118,8 +143,28 @@ class DeviceController:
         if not self.simulate:
             time.sleep(seconds)
 
+    def defer_sleep(self, seconds: float) -> None:
+        """Acumula una pausa que se aplica antes de la próxima acción observable.
+
+        Varias pausas consecutivas se funden en un solo ``time.sleep``;
+        ``tap``/``swipe``/``capture_screen`` las descargan automáticamente.
+        """
+        if seconds > 0:
+            self._pending_sleep += seconds
+
+    def flush_sleep(self) -> None:
+        """Aplica de una vez las pausas acumuladas con ``defer_sleep``."""
+        pending = self._pending_sleep
+        if pending <= 0:
+            return
+        self._pending_sleep = 0.0
+        self.console.log(f"Esperando {pending:.1f}s")
+        if not self.simulate:
+            time.sleep(pending)
+
     def capture_screen(self) -> Optional[bytes]:
         """Obtiene un PNG del framebuffer y maneja reintentos básicos."""
+        self.flush_sleep()
         cmd = [self._adb_path, "-s", self.serial, "exec-out", "screencap -p"]
         if self.simulate:
             self.console.log(f"[simulate] {' '.join(cmd)}")
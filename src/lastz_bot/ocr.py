@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import re
 import os
+import threading
 from datetime import timedelta
 from typing import List, Optional, Tuple
 
@@ -11,6 +12,13 @@ import cv2
 import numpy as np
 import pytesseract
 
+try:
+    import tesserocr
+    from PIL import Image
+except ImportError:  # pragma: no cover - dependencia opcional
+    tesserocr = None
+    Image = None
+
 Coord = Tuple[int, int]
 Region = Tuple[Coord, Coord]
 
@@ -22,6 +30,49 @@ _TIMER_PATTERN = re.compile(
     r"(?:(?P<days>\d+)\s*d\s*)?(?P<hours>\d{1,2}):(?P<minutes>\d{2}):(?P<seconds>\d{2})"
 )
 _TIMER_OCR_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789d:"
+_TIMER_CHAR_WHITELIST = "0123456789d:"
+
+# API persistente de tesserocr: evita lanzar un proceso tesseract por variante
+# (el arranque del binario domina el costo de cada invocación de pytesseract).
+_TESS_API: "tesserocr.PyTessBaseAPI | None" = None
+_TESS_API_FAILED = False
+_TESS_API_LOCK = threading.Lock()
+
+
+def _get_tess_api() -> "tesserocr.PyTessBaseAPI | None":
+    """Devuelve la instancia compartida de ``PyTessBaseAPI`` si está disponible.
+
+    Si la construcción falla (p. ej. tessdata ausente o mal configurado) se
+    recuerda el fallo y las llamadas siguientes caen a ``pytesseract`` sin
+    reintentar la inicialización por variante.
+    """
+    global _TESS_API, _TESS_API_FAILED
+    if tesserocr is None or Image is None or _TESS_API_FAILED:
+        return None
+    with _TESS_API_LOCK:
+        if _TESS_API is None and not _TESS_API_FAILED:
+            try:
+                api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_LINE)
+                api.SetVariable("tessedit_char_whitelist", _TIMER_CHAR_WHITELIST)
+            except (RuntimeError, OSError):
+                _TESS_API_FAILED = True
+                return None
+            _TESS_API = api
+        return _TESS_API
+
+
+def _ocr_timer_text(variant: np.ndarray) -> str:
+    """Extrae texto de una variante binarizada usando la API persistente.
+
+    Cae a ``pytesseract`` (proceso por llamada) solo cuando ``tesserocr`` no
+    está instalado.
+    """
+    api = _get_tess_api()
+    if api is None:
+        return pytesseract.image_to_string(variant, config=_TIMER_OCR_CONFIG)
+    with _TESS_API_LOCK:
+        api.SetImage(Image.fromarray(variant))
+        return api.GetUTF8Text()
 
 
 def read_timer_from_region(image: np.ndarray, region: Region) -> Optional[timedelta]:
@@ -47,7 +98,7 @@ def read_timer_from_region(image: np.ndarray, region: Region) -> Optional[timede
     if green_suppressed is not None:
         variants.extend(_timer_binary_variants(green_suppressed))
     for variant in variants:
-        text = pytesseract.image_to_string(variant, config=_TIMER_OCR_CONFIG)
+        text = _ocr_timer_text(variant)
         parsed = _parse_timer_string(text)
         if parsed:
             return parsed
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Dict, List, Sequence, Tuple
 
 import cv2
+import numpy as np
 import pytesseract
 
 from .base import TaskContext
@@ -66,6 +67,7 @@ class GatherConfig:
     preferred_idle_slots: List[str]
     empty_troop_template_names: List[str]
     empty_troop_threshold: float
+    frame_reuse_max_age_ms: float
     resource_tab_button: str | None
     resource_tab_delay: float
     max_troops: int
@@ -181,6 +183,7 @@ class GatherConfig:
                     params.get("template_threshold", 0.85),
                 )
             ),
+            frame_reuse_max_age_ms=float(params.get("frame_reuse_max_age_ms", 250.0)),
             resource_tab_button=str(params.get("resource_tab_button"))
             if params.get("resource_tab_button")
             else None,
@@ -238,6 +241,8 @@ class GatherCycleTask:
         self._missing_templates: set[str] = set()
         self._missing_buttons: set[str] = set()
         self._resource_dispatches: Dict[str, int] = {}
+        self._warm_templates: Dict[Path, np.ndarray | None] = {}
+        self._templates_warmed = False
 
     def _await_troop_state_sample(
         self,
@@ -838,7 +843,7 @@ class GatherCycleTask:
         task: str,
     ) -> None:
         """Registra por qué no salió la tropa e identifica falta de unidades."""
-        label = (slot.label or slot.slot_id).upper()
+        label = slot.display_label
         if self._detect_empty_troop_overlay(ctx, config):
             ctx.console.log(
                 f"[warning] {task}: la tropa {label} no tiene unidades (0); se omite la tarea"
@@ -855,9 +860,14 @@ class GatherCycleTask:
         paths = self._paths_from_names(ctx, config.empty_troop_template_names)
         if not paths:
             return False
+        frame = None
+        frame_age = ctx.vision.last_frame_age_ms()
+        if frame_age is not None and frame_age < config.frame_reuse_max_age_ms:
+            frame = ctx.vision.last_frame
         result = ctx.vision.find_any_template(
             paths,
             threshold=config.empty_troop_threshold,
+            image=frame,
         )
         return result is not None
 
@@ -881,23 +891,27 @@ class GatherCycleTask:
 
         active_count, active_slots = info
         prefix = f"{context}: " if context else ""
-        ctx.console.log(
+        lines = [
             f"{prefix}Tropas recolectando/marchando actualmente: {active_count}/{config.max_troops}"
-        )
+        ]
         if active_slots:
-            labels = ", ".join(
-                (slot.label or slot.slot_id).upper() for slot in active_slots
-            )
-            ctx.console.log(f"{prefix}Slots ocupados: {labels}")
+            labels = ", ".join(slot.display_label for slot in active_slots)
+            lines.append(f"{prefix}Slots ocupados: {labels}")
 
         effective_count = max(active_count, manual_dispatches)
         if effective_count >= config.max_troops:
-            ctx.console.log(
-                "Límite alcanzado; gather_cycle termina sin nuevos envíos"
-            )
+            lines.append("Límite alcanzado; gather_cycle termina sin nuevos envíos")
+            self._log_block(ctx, lines)
             return False
+        self._log_block(ctx, lines)
         return True
 
+    @staticmethod
+    def _log_block(ctx: TaskContext, lines: List[str]) -> None:
+        """Emite varias líneas de log en una sola llamada para reducir flushes."""
+        if lines:
+            ctx.console.log("\n".join(lines))
+
     def _count_active_gatherers(
         self,
         ctx: TaskContext,
@@ -936,7 +950,7 @@ class GatherCycleTask:
 
     def _log_slot_selection(self, ctx: TaskContext, slot: TroopSlotStatus) -> None:
         """Imprime qué tropa se selecciona para facilitar auditorías."""
-        label = (slot.label or slot.slot_id).upper()
+        label = slot.display_label
         ctx.console.log(
             f"Seleccionando tropa {label} (estado actual: {describe_activity(slot.state)})"
         )
@@ -1130,12 +1144,32 @@ class GatherCycleTask:
             return None
 
     # --- utilidades ------------------------------------------------------
+    def _warm_template_cache(self, ctx: TaskContext, config: GatherConfig) -> None:
+        """Precarga en memoria los templates fijos conocidos desde el arranque."""
+        if self._templates_warmed:
+            return
+        self._templates_warmed = True
+        names: List[str] = []
+        for template_names in config.level_indicator_templates.values():
+            names.extend(template_names)
+        names.extend(config.idle_template_names)
+        names.extend(config.empty_troop_template_names)
+        for path in self._paths_from_names(ctx, names):
+            self._warm_template(path)
+
+    def _warm_template(self, path: Path) -> np.ndarray | None:
+        """Devuelve el template ya decodificado, leyéndolo de disco solo una vez."""
+        if path not in self._warm_templates:
+            self._warm_templates[path] = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        return self._warm_templates[path]
+
     def _detect_current_level(
         self, ctx: TaskContext, config: GatherConfig
     ) -> int | None:
         """Analiza templates configurados para inferir el nivel seleccionado actualmente."""
         if not ctx.vision or not config.level_indicator_templates:
             return None
+        self._warm_template_cache(ctx, config)
         screenshot = ctx.vision.capture()
         if screenshot is None:
             return None
@@ -1168,7 +1202,7 @@ class GatherCycleTask:
                 except KeyError:
                     continue
                 for template_path in template_paths:
-                    template = cv2.imread(str(template_path), cv2.IMREAD_COLOR)
+                    template = self._warm_template(template_path)
                     if template is None:
                         continue
                     search_image = cropped
@@ -1340,7 +1374,8 @@ class GatherCycleTask:
         elapsed = 0.0
         while elapsed <= config.idle_clear_timeout:
             matches = self._find_idle_troops(ctx, config)
-            if not self._coord_present(coord, matches):
+            pool = np.asarray(matches, dtype=np.int32).reshape(-1, 2)
+            if not self._coord_present(coord, pool):
                 return True
             ctx.device.sleep(config.idle_clear_poll)
             elapsed += config.idle_clear_poll
@@ -1348,12 +1383,12 @@ class GatherCycleTask:
         return False
 
     @staticmethod
-    def _coord_present(target: Coord, pool: List[Coord], tolerance: int = 25) -> bool:
-        """Verifica si una coordenada aproximada existe dentro de una lista de matches."""
-        for coord in pool:
-            if abs(coord[0] - target[0]) <= tolerance and abs(coord[1] - target[1]) <= tolerance:
-                return True
-        return False
+    def _coord_present(target: Coord, pool: np.ndarray, tolerance: int = 25) -> bool:
+        """Verifica si una coordenada aproximada existe dentro del pool de matches."""
+        if pool.size == 0:
+            return False
+        diff = np.abs(pool - np.asarray(target, dtype=np.int32))
+        return bool((diff.max(axis=1) <= tolerance).any())
 
     def _tap_layout_button(
         self, ctx: TaskContext, button_name: str, *, label: str
@@ -116,8 +116,26 @@ class HealTroopsTask:
         transition_delay: float,
     ) -> bool:
         """Asegura que la cámara esté en el mapa mundial detectando world/sede."""
-        if self._wait_template(ctx, sede_paths, sede_threshold, timeout=2.0, label="sede-check"):
-            return True
+        found = self._find_first_of(
+            ctx,
+            {"sede": list(sede_paths), "world": list(world_paths)},
+            {"sede": sede_threshold, "world": world_threshold},
+        )
+        if found:
+            group, coords = found
+            if group == "sede":
+                return True
+            ctx.console.log("Botón de mundo detectado; abriendo el mapa")
+            ctx.device.tap(coords, label="world-button")
+            if transition_delay > 0:
+                ctx.device.sleep(transition_delay)
+            return self._wait_template(
+                ctx,
+                sede_paths,
+                sede_threshold,
+                timeout=world_timeout,
+                label="sede-check",
+            )
 
         if not self._tap_template(
             ctx,
@@ -137,6 +155,17 @@ class HealTroopsTask:
             label="sede-check",
         )
 
+    def _find_first_of(
+        self,
+        ctx: TaskContext,
+        groups: dict[str, List[Any]],
+        thresholds: dict[str, float],
+    ) -> tuple[str, tuple[int, int]] | None:
+        """Evalúa varios grupos sobre una sola captura, cada uno con su umbral."""
+        if not ctx.vision:
+            return None
+        return ctx.vision.match_groups(groups, thresholds=thresholds)
+
     def _collect_ready_troops(
         self,
         ctx: TaskContext,
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import itertools
+import queue
+import re
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, Tuple
 
@@ -10,25 +15,80 @@ import cv2
 import numpy as np
 import pytesseract
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - dependencia opcional
+    njit = None
+
+from ..debug import get_debug_reporter
 from ..ocr import read_timer_from_region
 from .base import TaskContext
-from .utils import tap_back_button
+from .utils import freeze_params, tap_back_button
 
 Coord = Tuple[int, int]
 Region = Tuple[Coord, Coord]
 
-_TEMPLATE_CACHE: Dict[Path, np.ndarray] = {}
+# Sanitiza motivos de fallo para nombres de archivo; la sustitución corre en C
+# en lugar del lazo por carácter de una comprehension.
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+@dataclass
+class _TemplateNccEntry:
+    """Template en gris centrado en cero con sus estadísticas precalculadas."""
+
+    centered: np.ndarray
+    tnorm: float
+    h: int
+    w: int
+    # Versión a media resolución para el pre-filtro grueso; ``None`` cuando el
+    # template reducido queda demasiado chico para ser discriminativo.
+    coarse: np.ndarray | None = None
+    # FFT conjugada del template (padded) por resolución de frame, para el
+    # camino de correlación con transformada de frame compartida.
+    ffts: Dict[Tuple[int, int], np.ndarray] = field(default_factory=dict)
+
+
+# Dimensión mínima del template reducido para habilitar el pase grueso.
+_COARSE_MIN_DIM = 8
+# Factor de relajación del umbral en el pase a media resolución.
+_COARSE_THRESHOLD_SCALE = 0.9
+
+
+_TEMPLATE_NCC_CACHE: Dict[Path, _TemplateNccEntry | None] = {}
+
+# Por debajo de este tamaño la correlación espacial sigue siendo más barata
+# que el camino por DFT (mismo corte que usa el backend OCL de OpenCV); el
+# matchTemplate directo sirve además de guarda independiente del camino
+# integral + CCORR compartido.
+_NCC_DFT_MIN_AREA = 18 * 18
+
+
+@lru_cache(maxsize=256)
+def _as_list_cached(value: str) -> Tuple[str, ...]:
+    text = value.strip()
+    if text.startswith("[") and text.endswith("]"):
+        # Escaneo con find en una sola pasada: evita la lista intermedia de
+        # split y los strip encadenados por elemento.
+        items: List[str] = []
+        start = 1
+        end = len(text) - 1
+        while start < end:
+            comma = text.find(",", start, end)
+            if comma < 0:
+                comma = end
+            piece = text[start:comma].strip().strip("\"'")
+            if piece:
+                items.append(piece)
+            start = comma + 1
+        return tuple(items)
+    return (text,) if text else ()
 
 
 def _as_list(value: object) -> List[str]:
     if value is None:
         return []
     if isinstance(value, str):
-        text = value.strip()
-        if text.startswith("[") and text.endswith("]"):
-            raw_items = text[1:-1].split(",")
-            return [item.strip().strip("\"'") for item in raw_items if item.strip()]
-        return [text] if text else []
+        return list(_as_list_cached(value))
     items: List[str] = []
     for entry in value:  # type: ignore[arg-type]
         text = str(entry).strip()
@@ -37,6 +97,18 @@ def _as_list(value: object) -> List[str]:
     return items
 
 
+@lru_cache(maxsize=256)
+def _coord_from_str(value: str) -> Coord | None:
+    comma = value.find(",")
+    if comma < 0 or value.find(",", comma + 1) >= 0:
+        return None
+    try:
+        # int() tolera espacios alrededor, así que no hacen falta strips.
+        return int(value[:comma]), int(value[comma + 1 :])
+    except (TypeError, ValueError):
+        return None
+
+
 def _coord_from_value(value: object, fallback: Coord | None = None) -> Coord | None:
     if isinstance(value, (list, tuple)) and len(value) == 2:
         try:
@@ -44,15 +116,26 @@ def _coord_from_value(value: object, fallback: Coord | None = None) -> Coord | N
         except (TypeError, ValueError):
             return fallback
     if isinstance(value, str):
-        parts = value.split(",")
-        if len(parts) == 2:
-            try:
-                return int(parts[0].strip()), int(parts[1].strip())
-            except (TypeError, ValueError):
-                return fallback
+        coord = _coord_from_str(value)
+        return coord if coord is not None else fallback
     return fallback
 
 
+def _clip_region(region: Region, shape: Tuple[int, ...]) -> Tuple[int, int, int, int] | None:
+    """Normaliza una región a ``(x0, y0, x1, y1)`` ordenada y recortada al frame.
+
+    Centraliza el ``sorted`` + clamping que antes repetían los chequeos MAX y
+    los helpers de debug; devuelve ``None`` si la región queda vacía.
+    """
+    (x1, y1), (x2, y2) = region
+    height, width = shape[0], shape[1]
+    x_start, x_end = sorted((max(0, min(x1, width)), max(0, min(x2, width))))
+    y_start, y_end = sorted((max(0, min(y1, height)), max(0, min(y2, height))))
+    if x_end <= x_start or y_end <= y_start:
+        return None
+    return x_start, y_start, x_end, y_end
+
+
 def _region_from_value(value: object) -> Region | None:
     if not isinstance(value, (list, tuple)) or len(value) != 2:
         return None
@@ -63,17 +146,268 @@ def _region_from_value(value: object) -> Region | None:
     return start, end
 
 
+def _scan_peaks(
+    result_map: np.ndarray,
+    threshold: float,
+    width: int,
+    height: int,
+    max_results: int,
+) -> np.ndarray:
+    """Extrae hasta ``max_results`` picos del mapa NCC con supresión greedy.
+
+    Una sola pasada de umbral recolecta los candidatos, se ordenan por
+    puntaje descendente y la supresión usa el mismo footprint rectangular
+    (abajo/derecha del pico) que la versión minMaxLoc+rectangle original.
+    Escrito en bucles planos para que Numba lo compile a nativo; sin Numba
+    la versión OpenCV sigue siendo la usada.
+    """
+    rows, cols = result_map.shape
+    count = 0
+    for y in range(rows):
+        for x in range(cols):
+            if result_map[y, x] >= threshold:
+                count += 1
+    if count == 0:
+        return np.empty((0, 2), np.int32)
+    ys = np.empty(count, np.int32)
+    xs = np.empty(count, np.int32)
+    vals = np.empty(count, np.float32)
+    fill = 0
+    for y in range(rows):
+        for x in range(cols):
+            value = result_map[y, x]
+            if value >= threshold:
+                ys[fill] = y
+                xs[fill] = x
+                vals[fill] = value
+                fill += 1
+    order = np.argsort(-vals)
+    kept_y = np.empty(max_results, np.int32)
+    kept_x = np.empty(max_results, np.int32)
+    centers = np.empty((max_results, 2), np.int32)
+    kept = 0
+    for position in range(count):
+        index = order[position]
+        y = ys[index]
+        x = xs[index]
+        suppressed = False
+        for j in range(kept):
+            if 0 <= y - kept_y[j] <= height and 0 <= x - kept_x[j] <= width:
+                suppressed = True
+                break
+        if suppressed:
+            continue
+        kept_y[kept] = y
+        kept_x[kept] = x
+        centers[kept, 0] = x + width // 2
+        centers[kept, 1] = y + height // 2
+        kept += 1
+        if kept >= max_results:
+            break
+    return centers[:kept]
+
+
+if njit is not None:
+    _scan_peaks = njit(cache=True, fastmath=True)(_scan_peaks)
+
+
+_CONFIG_CACHE: Dict[Tuple[Any, ...], "InvestigationConfig"] = {}
+
+
+@lru_cache(maxsize=None)
+def _load_template_str(path_str: str) -> np.ndarray | None:
+    # Keyed por str: el hash de Path pasa por os.fspath y cada miss del dict
+    # anterior repetía el stat de path.exists(); lru_cache memoriza también
+    # los misses, así el stat se paga una sola vez por ruta.
+    template = cv2.imread(path_str, cv2.IMREAD_COLOR)
+    return template
+
+
 def _load_template(path: Path) -> np.ndarray | None:
-    cached = _TEMPLATE_CACHE.get(path)
-    if cached is not None:
-        return cached
-    if not path.exists():
-        return None
-    template = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    return _load_template_str(str(path))
+
+
+def _load_template_ncc(path: Path) -> _TemplateNccEntry | None:
+    """Devuelve el template en gris centrado en cero junto con su norma.
+
+    La entrada cacheada permite calcular TM_CCOEFF_NORMED vía TM_CCORR (que
+    OpenCV resuelve con DFT para templates grandes) más imágenes integrales,
+    en lugar de la correlación espacial BGR completa.
+    """
+    if path in _TEMPLATE_NCC_CACHE:
+        return _TEMPLATE_NCC_CACHE[path]
+    template = _load_template(path)
     if template is None:
+        _TEMPLATE_NCC_CACHE[path] = None
         return None
-    _TEMPLATE_CACHE[path] = template
-    return template
+    gray_u8 = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+    gray = gray_u8.astype(np.float32)
+    centered = gray - float(gray.mean())
+    tnorm = float(np.sqrt(np.sum(centered * centered)))
+    h, w = centered.shape[:2]
+    coarse: np.ndarray | None = None
+    small = cv2.pyrDown(gray_u8)
+    if min(small.shape[:2]) >= _COARSE_MIN_DIM:
+        small32 = small.astype(np.float32)
+        coarse = np.ascontiguousarray(small32 - float(small32.mean()))
+    entry = _TemplateNccEntry(
+        centered=np.ascontiguousarray(centered),
+        tnorm=tnorm,
+        h=h,
+        w=w,
+        coarse=coarse,
+    )
+    _TEMPLATE_NCC_CACHE[path] = entry
+    return entry
+
+
+def _ncc_via_dft(
+    gray32: np.ndarray,
+    integrals: Tuple[np.ndarray, np.ndarray],
+    entry: _TemplateNccEntry,
+) -> np.ndarray:
+    """Calcula el mapa TM_CCOEFF_NORMED usando TM_CCORR + imágenes integrales.
+
+    El numerador de CCOEFF equivale a correlacionar el frame con el template
+    centrado en cero; el denominador sale de las sumas por ventana derivadas
+    de ``cv2.integral2``, evitando re-normalizar píxel a píxel.
+    """
+    numerator = cv2.matchTemplate(gray32, entry.centered, cv2.TM_CCORR)
+    return _ncc_normalize(numerator, integrals, entry)
+
+
+def _ncc_normalize(
+    numerator: np.ndarray,
+    integrals: Tuple[np.ndarray, np.ndarray],
+    entry: _TemplateNccEntry,
+) -> np.ndarray:
+    """Normaliza un numerador CCOEFF con las sumas por ventana del frame."""
+    h, w, tnorm = entry.h, entry.w, entry.tnorm
+    ii, ii2 = integrals
+    # La integral de sumas de un frame u8 llega como int32: el cuadrado de una
+    # suma por ventana tipica (~3e5) desborda 2^31 y corrompe el denominador,
+    # asi que se pasa a float64 antes de elevar.
+    win_sum = (ii[h:, w:] - ii[:-h, w:] - ii[h:, :-w] + ii[:-h, :-w]).astype(
+        np.float64
+    )
+    win_sqsum = ii2[h:, w:] - ii2[:-h, w:] - ii2[h:, :-w] + ii2[:-h, :-w]
+    area = float(h * w)
+    variance = np.maximum(win_sqsum - (win_sum * win_sum) / area, 0.0)
+    denominator = np.sqrt(variance) * tnorm
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    return np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+
+
+def _template_fft(entry: _TemplateNccEntry, shape: Tuple[int, int]) -> np.ndarray:
+    """FFT conjugada del template padded al tamaño del frame (cacheada)."""
+    cached = entry.ffts.get(shape)
+    if cached is None:
+        cached = np.conj(np.fft.rfft2(entry.centered, s=shape))
+        entry.ffts[shape] = cached
+    return cached
+
+
+def _ncc_via_frame_fft(
+    frame_fft: np.ndarray,
+    shape: Tuple[int, int],
+    integrals: Tuple[np.ndarray, np.ndarray],
+    entry: _TemplateNccEntry,
+) -> np.ndarray:
+    """Mapa TM_CCOEFF_NORMED reutilizando la FFT del frame ya calculada.
+
+    Con K templates sobre la misma captura el costo baja de 2K a K+1
+    transformadas: la del frame se paga una vez por captura y la de cada
+    template queda cacheada por resolución en su entrada.
+    """
+    corr = np.fft.irfft2(frame_fft * _template_fft(entry, shape), s=shape)
+    numerator = corr[: shape[0] - entry.h + 1, : shape[1] - entry.w + 1]
+    return _ncc_normalize(numerator, integrals, entry)
+
+
+def _warm_template_caches(config: "InvestigationConfig") -> None:
+    """Precarga todos los templates del config en los caches de matching.
+
+    Evita que el primer tick pague ``cv2.imread`` + conversión a gris en medio
+    del flujo de detección; tras esto los matchers solo hacen lookups.
+    """
+    groups: Tuple[Sequence[Path], ...] = (
+        config.icon_templates,
+        config.panel_templates,
+        config.free_button_templates,
+        config.complete_button_templates,
+        config.start_button_templates,
+        config.alliance_button_templates,
+        config.recommended_panel_templates,
+        config.recommended_back_templates,
+        config.node_invest_templates,
+        config.help_button_templates,
+        config.max_label_templates,
+        config.resource_panel_templates,
+        config.resource_target_templates,
+        config.resource_use_button_templates,
+        config.resource_batch_button_templates,
+        config.badge_store_templates,
+        config.overlay_templates,
+    )
+    for group in groups:
+        for path in group:
+            _load_template_ncc(path)
+    for node_template in config.node_templates:
+        _load_template_ncc(node_template.template)
+
+
+# Directorios de capturas en vivo por granja: el mkdir (con su stat implícito)
+# se paga una sola vez por sesión en lugar de una vez por frame de debug.
+_LIVE_DIR_CACHE: Dict[str, Path] = {}
+
+
+def _live_dir(farm_name: str) -> Path:
+    live_dir = _LIVE_DIR_CACHE.get(farm_name)
+    if live_dir is None:
+        live_dir = Path("debug_reports") / "live" / farm_name
+        live_dir.mkdir(parents=True, exist_ok=True)
+        _LIVE_DIR_CACHE[farm_name] = live_dir
+    return live_dir
+
+
+# Escrituras de depuración en segundo plano: el encode PNG de un frame completo
+# tarda decenas de milisegundos y no debe bloquear el lazo de detección. La cola
+# es acotada y descarta capturas cuando el worker no da abasto.
+_DEBUG_WRITE_QUEUE: "queue.Queue[Tuple[str, np.ndarray]] | None" = None
+_DEBUG_WRITE_LOCK = threading.Lock()
+
+
+def _debug_write_worker(pending: "queue.Queue[Tuple[str, np.ndarray]]") -> None:
+    while True:
+        path_str, image = pending.get()
+        try:
+            cv2.imwrite(path_str, image)
+        except Exception:
+            pass
+        finally:
+            pending.task_done()
+
+
+def _debug_imwrite_async(path: Path, image: np.ndarray) -> None:
+    """Encola una escritura PNG en el hilo de depuración; descarta si está llena."""
+    global _DEBUG_WRITE_QUEUE
+    if _DEBUG_WRITE_QUEUE is None:
+        with _DEBUG_WRITE_LOCK:
+            if _DEBUG_WRITE_QUEUE is None:
+                pending: "queue.Queue[Tuple[str, np.ndarray]]" = queue.Queue(maxsize=32)
+                worker = threading.Thread(
+                    target=_debug_write_worker,
+                    args=(pending,),
+                    name="debug-imwrite",
+                    daemon=True,
+                )
+                worker.start()
+                _DEBUG_WRITE_QUEUE = pending
+    try:
+        _DEBUG_WRITE_QUEUE.put_nowait((str(path), image.copy()))
+    except queue.Full:
+        pass
 
 
 @dataclass
@@ -111,8 +445,14 @@ class InvestigationConfig:
     overlay_dismiss_tap: Coord | None
     overlay_use_brightness: bool
     overlay_dark_threshold: float
+    # Umbral precalculado en escala uint8 para comparar contra el brillo
+    # entero sin convertir a float en cada chequeo.
+    overlay_dark_u8: int
     timer_region: Region
+    timer_roi: Tuple[slice, slice]
     nodes: Sequence[InvestigationNode]
+    nodes_taps: np.ndarray
+    nodes_regions: np.ndarray
     node_templates: Sequence[InvestigationNodeTemplate]
     default_max_region_offset: Region | None
     icon_threshold: float
@@ -135,10 +475,28 @@ class InvestigationConfig:
     overlay_delay: float
     badge_shortage_cooldown_minutes: float
     metadata_key: str
+    free_reduction_minutes: float
+    help_reduction_minutes: float
+    # Descriptores precargados para los lazos calientes: evitan el lookup por
+    # Path y el chequeo de None por template en cada frame.
+    prepared_node_templates: Sequence[Tuple[_TemplateNccEntry, InvestigationNodeTemplate]] = ()
+    prepared_max_labels: Sequence[Tuple[_TemplateNccEntry, str]] = ()
 
     @staticmethod
     def from_params(ctx: TaskContext, params: Dict[str, Any]) -> "InvestigationConfig":
         layout = ctx.layout
+        try:
+            cache_key: Tuple[Any, ...] | None = (
+                id(layout),
+                getattr(ctx.farm, "name", None),
+                freeze_params(params),
+            )
+        except TypeError:
+            cache_key = None
+        if cache_key is not None:
+            cached = _CONFIG_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
 
         def resolve(names: Sequence[str]) -> List[Path]:
             paths: List[Path] = []
@@ -172,6 +530,10 @@ class InvestigationConfig:
         overlay_dismiss_button = str(overlay_dismiss_button_raw).strip() if overlay_dismiss_button_raw else None
         overlay_dismiss_tap = _coord_from_value(params.get("overlay_dismiss_tap"), (539, 0))
         timer_region = _region_from_value(params.get("timer_region")) or ((183, 363), (341, 380))
+        (timer_x1, timer_y1), (timer_x2, timer_y2) = timer_region
+        timer_x_start, timer_x_end = sorted((max(0, timer_x1), max(0, timer_x2)))
+        timer_y_start, timer_y_end = sorted((max(0, timer_y1), max(0, timer_y2)))
+        timer_roi = (slice(timer_y_start, timer_y_end), slice(timer_x_start, timer_x_end))
         default_max_region_offset = _region_from_value(params.get("default_max_region_offset"))
 
         nodes: List[InvestigationNode] = []
@@ -180,6 +542,15 @@ class InvestigationConfig:
             max_region = _region_from_value(entry.get("max_region")) if isinstance(entry, dict) else None
             if tap and max_region:
                 nodes.append(InvestigationNode(tap=tap, max_region=max_region))
+        # Vistas SoA de los nodos: permiten recorrer taps/regiones como slices
+        # int32 contiguos en lugar de desempacar dataclasses por iteración.
+        nodes_taps = np.asarray(
+            [node.tap for node in nodes], dtype=np.int32
+        ).reshape(-1, 2)
+        nodes_regions = np.asarray(
+            [[*node.max_region[0], *node.max_region[1]] for node in nodes],
+            dtype=np.int32,
+        ).reshape(-1, 4)
         raw_node_templates = params.get("node_templates", [])
         if isinstance(raw_node_templates, str):
             node_entries: Sequence[Any] = _as_list(raw_node_templates)
@@ -218,7 +589,7 @@ class InvestigationConfig:
                 "[warning] No se configuraron nodos ni plantillas para investigation; agrega al menos una opción"
             )
 
-        return InvestigationConfig(
+        config = InvestigationConfig(
             icon_templates=icon_templates,
             panel_templates=panel_templates,
             free_button_templates=free_button_templates,
@@ -239,9 +610,15 @@ class InvestigationConfig:
             overlay_dismiss_button=overlay_dismiss_button or None,
             overlay_dismiss_tap=overlay_dismiss_tap,
             overlay_use_brightness=bool(params.get("overlay_use_brightness", False)),
-            overlay_dark_threshold=float(params.get("overlay_dark_threshold", 0.35)),
+            overlay_dark_threshold=(
+                overlay_dark := float(params.get("overlay_dark_threshold", 0.35))
+            ),
+            overlay_dark_u8=int(overlay_dark * 255),
             timer_region=timer_region,
+            timer_roi=timer_roi,
             nodes=nodes,
+            nodes_taps=nodes_taps,
+            nodes_regions=nodes_regions,
             node_templates=node_templates,
             default_max_region_offset=default_max_region_offset,
             icon_threshold=float(params.get("icon_threshold", 0.82)),
@@ -266,13 +643,48 @@ class InvestigationConfig:
                 params.get("badge_shortage_cooldown_minutes", 1440.0)
             ),
             metadata_key=str(params.get("metadata_key") or "next_ready_at"),
+            free_reduction_minutes=max(
+                0.0, float(getattr(ctx.farm, "free_research_minutes", 0.0) or 0.0)
+            ),
+            help_reduction_minutes=max(
+                0.0,
+                float(getattr(ctx.farm, "alliance_help_limit", 0) or 0)
+                * float(getattr(ctx.farm, "alliance_help_minutes", 0.0) or 0.0),
+            ),
+        )
+        _warm_template_caches(config)
+        config.prepared_node_templates = tuple(
+            (entry, template_cfg)
+            for template_cfg in config.node_templates
+            if (entry := _load_template_ncc(template_cfg.template)) is not None
+        )
+        config.prepared_max_labels = tuple(
+            (entry, path.stem)
+            for path in config.max_label_templates
+            if (entry := _load_template_ncc(path)) is not None
         )
+        if cache_key is not None:
+            _CONFIG_CACHE[cache_key] = config
+        return config
 
 
 class InvestigationTask:
     name = "investigation"
     manual_daily_logging = True
 
+    # Cache en memoria del next_ready_at por granja: evita tocar el
+    # daily_tracker (I/O a disco) en cada tick mientras el timer no venza.
+    _READY_CACHE: Dict[str, datetime] = {}
+
+    def __init__(self) -> None:
+        # Buffer de captura reutilizado entre ticks; mantiene vistas estables
+        # (p. ej. el ROI del timer) sin reasignar varios MB por captura.
+        self._frame_buf: np.ndarray | None = None
+        # Prefijo de sesión + contador monótono para nombres de capturas de
+        # debug: evita un strftime por frame y garantiza orden sin colisiones.
+        self._session = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._dbg_seq = itertools.count()
+
     def run(self, ctx: TaskContext, params: Dict[str, Any]) -> None:  # type: ignore[override]
         if not ctx.vision:
             ctx.console.log("[warning] VisionHelper no disponible; investigation requiere detecciones")
@@ -282,8 +694,8 @@ class InvestigationTask:
         if not config.icon_templates:
             ctx.console.log("[warning] No se configuró el ícono de investigación")
             return
-        next_ready = self._get_next_ready_at(ctx, config)
         now = datetime.now()
+        next_ready = self._get_next_ready_at(ctx, config, now=now)
         if next_ready and next_ready > now:
             remaining = next_ready - now
             ctx.console.log(
@@ -303,7 +715,12 @@ class InvestigationTask:
 
         handled = False
         started_new_research = False
-        if self._has_template(ctx, config.complete_button_templates, config.button_threshold):
+        if self._has_template(
+            ctx,
+            config.complete_button_templates,
+            config.button_threshold,
+            frame=ctx.vision.last_frame if ctx.vision else None,
+        ):
             handled = self._complete_and_restart(ctx, config)
             if not handled:
                 self._close_panel(ctx, config)
@@ -350,9 +767,10 @@ class InvestigationTask:
         auto_recommended = False
 
         while attempts <= max_attempts:
-            if self._is_main_panel_visible(ctx, config):
+            frame = ctx.vision.capture()
+            if self._is_main_panel_visible(ctx, config, frame=frame):
                 return True, saw_recommended, auto_recommended
-            if self._is_recommended_panel_visible(ctx, config):
+            if self._is_recommended_panel_visible(ctx, config, frame=frame):
                 saw_recommended = True
                 if tried_open:
                     auto_recommended = True
@@ -373,29 +791,42 @@ class InvestigationTask:
             attempts += 1
         return self._is_main_panel_visible(ctx, config), saw_recommended, auto_recommended
 
-    def _is_main_panel_visible(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
+    def _is_main_panel_visible(
+        self,
+        ctx: TaskContext,
+        config: InvestigationConfig,
+        frame: np.ndarray | None = None,
+    ) -> bool:
         if not ctx.vision or not config.panel_templates:
             return False
-        result = ctx.vision.find_any_template(
+        result = ctx.vision.find_any_template_pyramid(
             config.panel_templates,
             threshold=config.panel_threshold,
+            image=frame,
         )
         if result:
             return True
         if ctx.vision and config.alliance_button_templates:
-            secondary = ctx.vision.find_any_template(
+            secondary = ctx.vision.find_any_template_pyramid(
                 config.alliance_button_templates,
                 threshold=config.button_threshold,
+                image=frame,
             )
             return bool(secondary)
         return False
 
-    def _is_recommended_panel_visible(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
+    def _is_recommended_panel_visible(
+        self,
+        ctx: TaskContext,
+        config: InvestigationConfig,
+        frame: np.ndarray | None = None,
+    ) -> bool:
         if not ctx.vision or not config.recommended_panel_templates:
             return False
-        result = ctx.vision.find_any_template(
+        result = ctx.vision.find_any_template_pyramid(
             config.recommended_panel_templates,
             threshold=config.recommended_panel_threshold,
+            image=frame,
         )
         return bool(result)
 
@@ -423,6 +854,26 @@ class InvestigationTask:
         self._press_help_and_exit(ctx, config)
         return True
 
+    @staticmethod
+    def _wait_until(ctx: TaskContext, predicate, budget_s: float) -> bool:
+        """Sondea ``predicate`` con backoff hasta agotar el presupuesto.
+
+        Devuelve apenas el predicado sea verdadero, en lugar de dormir el
+        presupuesto completo; la pausa arranca corta y se duplica hasta
+        0.5 s para no multiplicar capturas, y pasa por ``ctx.device.sleep``
+        para respetar el modo simulate.
+        """
+        deadline = time.monotonic() + budget_s
+        pause = 0.1
+        while True:
+            if predicate():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ctx.device.sleep(min(pause, remaining))
+            pause = min(pause * 2, 0.5)
+
     def _open_panel(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
         if not self._tap_template_group(
             ctx,
@@ -433,7 +884,12 @@ class InvestigationTask:
         ):
             return False
         if config.panel_delay > 0:
-            ctx.device.sleep(config.panel_delay)
+            self._wait_until(
+                ctx,
+                lambda: self._is_main_panel_visible(ctx, config)
+                or self._is_recommended_panel_visible(ctx, config),
+                config.panel_delay,
+            )
         self._claim_free_completion(ctx, config)
         return True
 
@@ -449,7 +905,11 @@ class InvestigationTask:
                 label="research-recommended-back",
             ):
                 if config.back_delay > 0:
-                    ctx.device.sleep(config.back_delay)
+                    self._wait_until(
+                        ctx,
+                        lambda: not self._is_recommended_panel_visible(ctx, config),
+                        config.back_delay,
+                    )
                 return True
         self._press_back_button(
             ctx,
@@ -501,11 +961,16 @@ class InvestigationTask:
         *,
         apply_help_reduction: bool,
     ) -> bool:
-        screenshot = ctx.vision.capture()
+        screenshot = ctx.vision.capture_into(self._frame_buf)
         if screenshot is None:
             return False
+        self._frame_buf = screenshot
+        timer_crop = screenshot[config.timer_roi]
+        if timer_crop.size == 0:
+            return False
+        crop_region: Region = ((0, 0), (timer_crop.shape[1], timer_crop.shape[0]))
         try:
-            remaining = read_timer_from_region(screenshot, config.timer_region)
+            remaining = read_timer_from_region(timer_crop, crop_region)
         except pytesseract.TesseractNotFoundError:
             failure_path = self._record_timer_failure_debug(
                 ctx,
@@ -531,6 +996,7 @@ class InvestigationTask:
             return False
         adjusted_remaining, reduction_minutes = self._apply_research_reductions(
             ctx,
+            config,
             remaining,
             include_help=apply_help_reduction,
         )
@@ -559,6 +1025,7 @@ class InvestigationTask:
         reduction_minutes: float = 0.0,
         raw_duration: timedelta | None = None,
     ) -> None:
+        self._READY_CACHE[ctx.farm.name] = ready_at
         if not ctx.daily_tracker:
             return
         ctx.daily_tracker.set_metadata(
@@ -590,6 +1057,7 @@ class InvestigationTask:
             )
 
     def _clear_ready_metadata(self, ctx: TaskContext, config: InvestigationConfig) -> None:
+        self._READY_CACHE.pop(ctx.farm.name, None)
         if not ctx.daily_tracker:
             return
         ctx.daily_tracker.set_metadata(
@@ -629,7 +1097,13 @@ class InvestigationTask:
         self,
         ctx: TaskContext,
         config: InvestigationConfig,
+        now: datetime | None = None,
     ) -> datetime | None:
+        if now is None:
+            now = datetime.now()
+        cached = self._READY_CACHE.get(ctx.farm.name)
+        if cached and cached > now:
+            return cached
         if not ctx.daily_tracker:
             return None
         value = ctx.daily_tracker.get_metadata(
@@ -638,33 +1112,32 @@ class InvestigationTask:
             config.metadata_key,
         )
         if not value:
+            self._READY_CACHE.pop(ctx.farm.name, None)
             return None
         try:
-            return datetime.fromisoformat(str(value))
+            ready_at = datetime.fromisoformat(str(value))
         except ValueError:
             return None
+        self._READY_CACHE[ctx.farm.name] = ready_at
+        return ready_at
 
     def _apply_research_reductions(
         self,
         ctx: TaskContext,
+        config: InvestigationConfig,
         remaining: timedelta,
         *,
         include_help: bool,
     ) -> tuple[timedelta, float]:
-        if remaining.total_seconds() <= 0:
-            return remaining, 0.0
-        help_limit = getattr(ctx.farm, "alliance_help_limit", 0)
-        help_minutes = getattr(ctx.farm, "alliance_help_minutes", 0.0)
-        free_minutes = getattr(ctx.farm, "free_research_minutes", 0.0)
-        total_minutes = max(0.0, float(free_minutes))
-        if include_help and help_limit and help_minutes:
-            total_minutes += max(0.0, float(help_limit * help_minutes))
-        if total_minutes <= 0:
+        remaining_seconds = remaining.total_seconds()
+        total_seconds = (
+            config.free_reduction_minutes
+            + (config.help_reduction_minutes if include_help else 0.0)
+        ) * 60.0
+        applied_seconds = min(total_seconds, max(remaining_seconds, 0.0))
+        if applied_seconds <= 0.0:
             return remaining, 0.0
-        max_minutes = remaining.total_seconds() / 60.0
-        applied_minutes = min(total_minutes, max_minutes)
-        reduction = timedelta(minutes=applied_minutes)
-        return remaining - reduction, applied_minutes
+        return timedelta(seconds=remaining_seconds - applied_seconds), applied_seconds / 60.0
 
     # --- flow ----------------------------------------------------------
     def _complete_and_restart(
@@ -719,10 +1192,11 @@ class InvestigationTask:
     def _select_node_and_start(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
         if not ctx.vision:
             return False
-        screenshot = ctx.vision.capture()
+        screenshot = ctx.vision.capture_into(self._frame_buf)
         if screenshot is None:
             ctx.console.log("[warning] No se pudo capturar la pantalla de nodos")
             return False
+        self._frame_buf = screenshot
         if config.node_templates:
             return self._select_node_with_templates(ctx, config, screenshot)
         if config.nodes:
@@ -736,11 +1210,19 @@ class InvestigationTask:
         config: InvestigationConfig,
         screenshot: np.ndarray,
     ) -> bool:
-        for node in config.nodes:
-            if self._region_has_max(ctx, screenshot, config, node.max_region, "coords"):
+        score_maps = self._max_label_score_maps(config, screenshot)
+        taps = config.nodes_taps
+        regions = config.nodes_regions
+        for index in range(taps.shape[0]):
+            x1, y1, x2, y2 = regions[index]
+            region: Region = ((int(x1), int(y1)), (int(x2), int(y2)))
+            if self._region_has_max(
+                ctx, screenshot, config, region, "coords", score_maps=score_maps
+            ):
                 continue
-            self._record_node_candidate_debug(ctx, screenshot, node.tap, "coords")
-            ctx.device.tap(node.tap, label="research-node")
+            tap = (int(taps[index, 0]), int(taps[index, 1]))
+            self._record_node_candidate_debug(ctx, screenshot, tap, "coords")
+            ctx.device.tap(tap, label="research-node")
             if config.tap_delay > 0:
                 ctx.device.sleep(config.tap_delay)
             if not self._tap_template_group(
@@ -765,17 +1247,21 @@ class InvestigationTask:
         config: InvestigationConfig,
         screenshot: np.ndarray,
     ) -> bool:
-        matches = self._detect_node_templates(config, screenshot)
+        gray_stats = self._frame_gray_stats(screenshot)
+        matches = self._detect_node_templates(config, screenshot, gray_stats=gray_stats)
         if not matches:
             ctx.console.log("[warning] No se detectaron nodos de investigación en pantalla")
             return False
+        score_maps = self._max_label_score_maps(config, screenshot, gray_stats=gray_stats)
         for coords, template_cfg in matches:
             region = self._apply_region_offset(
                 coords,
                 template_cfg.max_region_offset or config.default_max_region_offset,
             )
             label = template_cfg.template.stem
-            if self._region_has_max(ctx, screenshot, config, region, label):
+            if self._region_has_max(
+                ctx, screenshot, config, region, label, score_maps=score_maps
+            ):
                 continue
             self._record_node_candidate_debug(ctx, screenshot, coords, label)
             ctx.device.tap(coords, label="research-node")
@@ -801,18 +1287,52 @@ class InvestigationTask:
         self,
         config: InvestigationConfig,
         screenshot: np.ndarray,
+        gray_stats: Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]] | None = None,
     ) -> List[Tuple[Coord, InvestigationNodeTemplate]]:
         matches: List[Tuple[Coord, InvestigationNodeTemplate]] = []
         if not config.node_templates or config.node_template_max_results <= 0:
             return matches
-        for template_cfg in config.node_templates:
+        gray, gray32, integrals = gray_stats or self._frame_gray_stats(screenshot)
+        # Pase grueso a media resolución: descarta templates ausentes tocando
+        # 1/4 de los píxeles antes de pagar el match a resolución completa.
+        gray_small32 = cv2.pyrDown(gray).astype(np.float32)
+        coarse_threshold = config.node_template_threshold * _COARSE_THRESHOLD_SCALE
+        survivors: List[Tuple[_TemplateNccEntry, InvestigationNodeTemplate]] = []
+        for entry, template_cfg in config.prepared_node_templates:
+            if (
+                entry.coarse is not None
+                and entry.coarse.shape[0] <= gray_small32.shape[0]
+                and entry.coarse.shape[1] <= gray_small32.shape[1]
+            ):
+                coarse_map = cv2.matchTemplate(
+                    gray_small32, entry.coarse, cv2.TM_CCOEFF_NORMED
+                )
+                _, coarse_max, _, _ = cv2.minMaxLoc(coarse_map)
+                if coarse_max < coarse_threshold:
+                    continue
+            survivors.append((entry, template_cfg))
+        if not survivors:
+            return matches
+        # Con varios templates supervivientes conviene transformar el frame una
+        # sola vez y correlacionar cada template en frecuencia (K+1 FFTs en
+        # lugar de 2K); con uno solo el camino matchTemplate directo gana.
+        frame_shape = (gray32.shape[0], gray32.shape[1])
+        frame_fft = np.fft.rfft2(gray32) if len(survivors) >= 2 else None
+        for entry, template_cfg in survivors:
             if len(matches) >= config.node_template_max_results:
                 break
-            template = _load_template(template_cfg.template)
-            if template is None:
-                continue
-            h, w = template.shape[:2]
-            result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+            h, w = entry.h, entry.w
+            if h * w < _NCC_DFT_MIN_AREA:
+                # CCOEFF_NORMED centra el template internamente, por lo que la
+                # versión en gris centrada en cero da el mismo mapa sin volver
+                # a leer ni convertir el BGR.
+                result = cv2.matchTemplate(
+                    gray32, entry.centered, cv2.TM_CCOEFF_NORMED
+                )
+            elif frame_fft is not None:
+                result = _ncc_via_frame_fft(frame_fft, frame_shape, integrals, entry)
+            else:
+                result = _ncc_via_dft(gray32, integrals, entry)
             remaining = config.node_template_max_results - len(matches)
             centers = self._consume_template_matches(
                 result,
@@ -850,23 +1370,53 @@ class InvestigationTask:
     ) -> List[Coord]:
         if max_results <= 0:
             return []
+        if njit is not None:
+            centers = _scan_peaks(
+                np.ascontiguousarray(result_map),
+                float(threshold),
+                width,
+                height,
+                max_results,
+            )
+            return [(int(center[0]), int(center[1])) for center in centers]
+        # Un solo pase de umbral + supresión greedy sobre la lista corta de
+        # candidatos: evita copiar el mapa float32 completo y los escaneos
+        # minMaxLoc repetidos de la variante copy+rectangle.
+        ys, xs = np.nonzero(result_map >= threshold)
+        if ys.size == 0:
+            return []
+        order = np.argsort(-result_map[ys, xs])
         matches: List[Coord] = []
-        working = result_map.copy()
-        while len(matches) < max_results:
-            _, max_val, _, max_loc = cv2.minMaxLoc(working)
-            if max_val < threshold:
+        kept: List[Tuple[int, int]] = []
+        for index in order:
+            y = int(ys[index])
+            x = int(xs[index])
+            suppressed = False
+            for kept_y, kept_x in kept:
+                # Mismo footprint que el rectángulo relleno de la versión
+                # anterior: solo tapa posiciones hacia abajo/derecha del pico.
+                if 0 <= y - kept_y <= height and 0 <= x - kept_x <= width:
+                    suppressed = True
+                    break
+            if suppressed:
+                continue
+            kept.append((y, x))
+            matches.append((x + width // 2, y + height // 2))
+            if len(matches) >= max_results:
                 break
-            center = (int(max_loc[0] + width / 2), int(max_loc[1] + height / 2))
-            matches.append(center)
-            cv2.rectangle(
-                working,
-                max_loc,
-                (max_loc[0] + width, max_loc[1] + height),
-                -1,
-                thickness=-1,
-            )
         return matches
 
+    @staticmethod
+    def _debug_enabled(ctx: TaskContext) -> bool:
+        """Indica si hay contexto de depuración activo para grabar capturas.
+
+        Mantiene las copias de frame, anotaciones y escrituras PNG fuera del
+        camino caliente cuando nadie va a consumirlas.
+        """
+        if not ctx.vision or not ctx.vision.farm_name:
+            return False
+        return bool(ctx.vision.debug_reporter or get_debug_reporter())
+
     def _record_node_candidate_debug(
         self,
         ctx: TaskContext,
@@ -874,12 +1424,18 @@ class InvestigationTask:
         coords: Coord,
         label: str,
     ) -> None:
-        if not ctx.vision or screenshot is None:
+        if screenshot is None or not self._debug_enabled(ctx):
             return
         try:
-            preview = screenshot.copy()
-            cv2.circle(preview, coords, 40, (0, 255, 0), 3)
-            ctx.vision._record_debug_frame(preview, f"research-node-{label}")
+            # Solo el ROI alrededor del candidato: copiar el frame completo
+            # (~6 MB en 1080p) por cada nodo inspeccionado es innecesario.
+            x0 = max(0, coords[0] - 80)
+            y0 = max(0, coords[1] - 80)
+            roi = screenshot[y0 : coords[1] + 80, x0 : coords[0] + 80].copy()
+            if roi.size == 0:
+                return
+            cv2.circle(roi, (coords[0] - x0, coords[1] - y0), 40, (0, 255, 0), 3)
+            ctx.vision._record_debug_frame(roi, f"research-node-{label}")
         except Exception:
             pass
 
@@ -890,35 +1446,28 @@ class InvestigationTask:
         config: InvestigationConfig,
         reason: str,
     ) -> Path | None:
-        if screenshot is None:
+        if screenshot is None or not self._debug_enabled(ctx):
             return None
         try:
-            reason_slug = "".join(ch if ch.isalnum() else "-" for ch in reason.lower()).strip("-") or "unknown"
+            reason_slug = _SLUG_RE.sub("-", reason.lower()).strip("-") or "unknown"
             if ctx.vision:
                 ctx.vision._record_debug_frame(
                     screenshot.copy(),
                     f"research-timer-failure-{reason_slug}",
                 )
             farm_name = ctx.farm.name if ctx.farm else "unknown"
-            live_dir = Path("debug_reports") / "live" / farm_name
-            live_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%H%M%S_%f")
-            base_name = f"{timestamp}_timer_failure_{reason_slug}"
+            live_dir = _live_dir(farm_name)
+            stamp = f"{self._session}_{next(self._dbg_seq):06d}"
+            base_name = f"{stamp}_timer_failure_{reason_slug}"
             full_path = live_dir / f"{base_name}.png"
-            cv2.imwrite(str(full_path), screenshot)
-
-            (x1, y1), (x2, y2) = config.timer_region
-            height, width = screenshot.shape[:2]
-            x_start, x_end = sorted((x1, x2))
-            y_start, y_end = sorted((y1, y2))
-            x_start = max(0, min(x_start, width))
-            x_end = max(0, min(x_end, width))
-            y_start = max(0, min(y_start, height))
-            y_end = max(0, min(y_end, height))
-            if x_end > x_start and y_end > y_start:
+            _debug_imwrite_async(full_path, screenshot)
+
+            clipped = _clip_region(config.timer_region, screenshot.shape)
+            if clipped is not None:
+                x_start, y_start, x_end, y_end = clipped
                 crop = screenshot[y_start:y_end, x_start:x_end]
                 if crop.size:
-                    cv2.imwrite(str(live_dir / f"{base_name}_crop.png"), crop)
+                    _debug_imwrite_async(live_dir / f"{base_name}_crop.png", crop)
                     if ctx.vision:
                         ctx.vision._record_debug_frame(
                             crop.copy(),
@@ -941,19 +1490,33 @@ class InvestigationTask:
         if screenshot is None:
             return
         try:
-            (x1, y1), (x2, y2) = region
-            x_start, x_end = sorted((x1, x2))
-            y_start, y_end = sorted((y1, y2))
-            preview = screenshot.copy()
+            clipped = _clip_region(region, screenshot.shape)
+            if clipped is None:
+                return
+            x_start, y_start, x_end, y_end = clipped
+            # Anota solo la región con un margen de 20 px; copiar el frame
+            # completo por cada chequeo MAX costaba varios MB de memcpy.
+            pad = 20
+            px0 = max(0, x_start - pad)
+            py0 = max(0, y_start - pad)
+            preview = screenshot[py0 : y_end + pad, px0 : x_end + pad].copy()
+            if preview.size == 0:
+                return
             color = (0, 200, 0) if matched else (0, 0, 255)
-            cv2.rectangle(preview, (x_start, y_start), (x_end, y_end), color, 2)
+            cv2.rectangle(
+                preview,
+                (x_start - px0, y_start - py0),
+                (x_end - px0, y_end - py0),
+                color,
+                2,
+            )
             text = f"{label} {'hit' if matched else 'miss'} {best_score:.2f}"
             if best_template:
                 text = f"{text} {best_template}"
             cv2.putText(
                 preview,
                 text,
-                (max(0, x_start - 5), max(20, y_start - 8)),
+                (max(0, x_start - px0 - 5), max(20, y_start - py0 - 8)),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
                 color,
@@ -967,22 +1530,64 @@ class InvestigationTask:
                 if crop.size:
                     ctx.vision._record_debug_frame(crop.copy(), f"research-max-{suffix}-crop-{label}")
             farm_name = ctx.farm.name if ctx.farm else "unknown"
-            live_dir = Path("debug_reports") / "live" / farm_name
-            live_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%H%M%S_%f")
-            cv2.imwrite(
-                str(live_dir / f"{timestamp}_{suffix}_{label}.png"),
-                preview,
-            )
+            live_dir = _live_dir(farm_name)
+            stamp = f"{self._session}_{next(self._dbg_seq):06d}"
+            _debug_imwrite_async(live_dir / f"{stamp}_{suffix}_{label}.png", preview)
             crop = screenshot[y_start:y_end, x_start:x_end]
             if crop.size:
-                cv2.imwrite(
-                    str(live_dir / f"{timestamp}_{suffix}_{label}_crop.png"),
+                _debug_imwrite_async(
+                    live_dir / f"{stamp}_{suffix}_{label}_crop.png",
                     crop,
                 )
         except Exception:
             pass
 
+    @staticmethod
+    def _frame_gray_stats(
+        screenshot: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Convierte el frame a gris una sola vez junto con sus integrales.
+
+        Ambos matchers (etiquetas MAX y templates de nodo) consumen la misma
+        tripleta, así la conversión BGR→gris y ``cv2.integral2`` se pagan una
+        vez por captura en lugar de una por matcher.
+        """
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        gray32 = gray.astype(np.float32)
+        integrals = cv2.integral2(gray)
+        return gray, gray32, integrals
+
+    def _max_label_score_maps(
+        self,
+        config: InvestigationConfig,
+        screenshot: np.ndarray,
+        gray_stats: Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]] | None = None,
+    ) -> List[Tuple[np.ndarray, int, int, str]]:
+        """Calcula un mapa NCC de frame completo por template de etiqueta MAX.
+
+        Los mapas se computan una sola vez por captura; `_region_has_max` luego
+        solo indexa la sub-ventana de cada nodo, en lugar de recortar y volver
+        a correr matchTemplate por región. Como TM_CCOEFF_NORMED normaliza por
+        ventana, recortar-y-matchear equivale a matchear-y-recortar.
+        """
+        maps: List[Tuple[np.ndarray, int, int, str]] = []
+        if not config.max_label_templates:
+            return maps
+        gray, gray32, integrals = gray_stats or self._frame_gray_stats(screenshot)
+        for entry, stem in config.prepared_max_labels:
+            if entry.h > gray.shape[0] or entry.w > gray.shape[1]:
+                continue
+            if entry.h * entry.w < _NCC_DFT_MIN_AREA:
+                # TM_CCOEFF_NORMED centra el template internamente, por lo que
+                # usar la versión centrada en cero da el mismo puntaje.
+                score_map = cv2.matchTemplate(
+                    gray32, entry.centered, cv2.TM_CCOEFF_NORMED
+                )
+            else:
+                score_map = _ncc_via_dft(gray32, integrals, entry)
+            maps.append((score_map, entry.h, entry.w, stem))
+        return maps
+
     def _region_has_max(
         self,
         ctx: TaskContext,
@@ -990,64 +1595,53 @@ class InvestigationTask:
         config: InvestigationConfig,
         region: Region | None,
         label: str,
+        score_maps: List[Tuple[np.ndarray, int, int, str]] | None = None,
     ) -> bool:
         if not config.max_label_templates or not region:
             return False
-        (x1, y1), (x2, y2) = region
-        x_start, x_end = sorted((x1, x2))
-        y_start, y_end = sorted((y1, y2))
-        height, width = screenshot.shape[:2]
-        x_start = max(0, min(x_start, width))
-        x_end = max(0, min(x_end, width))
-        y_start = max(0, min(y_start, height))
-        y_end = max(0, min(y_end, height))
-        if x_end <= x_start or y_end <= y_start:
+        clipped = _clip_region(region, screenshot.shape)
+        if clipped is None:
             return False
-        crop = screenshot[y_start:y_end, x_start:x_end]
-        if crop.size == 0:
+        x_start, y_start, x_end, y_end = clipped
+        if score_maps is None:
+            score_maps = self._max_label_score_maps(config, screenshot)
+        debug_active = self._debug_enabled(ctx)
+        best_score = 0.0
+        best_template: str | None = None
+        for score_map, template_h, template_w, stem in score_maps:
+            slice_y_end = y_end - template_h + 1
+            slice_x_end = x_end - template_w + 1
+            if slice_y_end <= y_start or slice_x_end <= x_start:
+                continue
+            window = score_map[y_start:slice_y_end, x_start:slice_x_end]
+            if window.size == 0:
+                continue
+            max_val = float(window.max())
+            if max_val >= config.max_label_threshold:
+                if debug_active:
+                    self._record_max_region_debug(
+                        ctx,
+                        screenshot,
+                        ((x_start, y_start), (x_end, y_end)),
+                        label,
+                        max(best_score, max_val),
+                        stem,
+                        matched=True,
+                    )
+                return True
+            if debug_active and max_val > best_score:
+                best_score = max_val
+                best_template = stem
+        if debug_active:
             self._record_max_region_debug(
                 ctx,
                 screenshot,
                 ((x_start, y_start), (x_end, y_end)),
                 label,
-                0.0,
-                None,
+                best_score,
+                best_template,
                 matched=False,
             )
-            return False
-        crop_gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-        best_score = 0.0
-        best_template: str | None = None
-        for template_path in config.max_label_templates:
-            template = _load_template(template_path)
-            if template is None or crop.shape[0] < template.shape[0] or crop.shape[1] < template.shape[1]:
-                continue
-            template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            result = cv2.matchTemplate(crop_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(result)
-            if max_val > best_score:
-                best_score = max_val
-                best_template = template_path.stem
-            if max_val >= config.max_label_threshold:
-                self._record_max_region_debug(
-                    ctx,
-                    screenshot,
-                    ((x_start, y_start), (x_end, y_end)),
-                    label,
-                    best_score,
-                    best_template,
-                    matched=True,
-                )
-                return True
-        self._record_max_region_debug(
-            ctx,
-            screenshot,
-            ((x_start, y_start), (x_end, y_end)),
-            label,
-            best_score,
-            best_template,
-            matched=False,
-        )
         return False
 
     def _handle_resource_requirements(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
@@ -1056,21 +1650,24 @@ class InvestigationTask:
         attempt = 0
         while attempt < 2:
             attempt += 1
-            if self._detect_badge_store(ctx, config):
-                self._handle_badge_shortage(ctx, config)
-                return False
-            panel = ctx.vision.wait_for_any_template(
-                config.resource_panel_templates,
+            # Un solo sondeo para ambos grupos: cada iteración captura un
+            # frame y prueba tienda de badges y panel de recursos contra él,
+            # en lugar de pagar un screencap por cada espera.
+            found = ctx.vision.match_groups(
+                {
+                    "badge_store": config.badge_store_templates,
+                    "resource_panel": config.resource_panel_templates,
+                },
+                threshold=config.button_threshold,
                 timeout=config.resource_wait_timeout,
                 poll_interval=0.5,
-                threshold=config.button_threshold,
-                raise_on_timeout=False,
+                thresholds={"badge_store": config.badge_store_threshold},
             )
-            if not panel:
-                if self._detect_badge_store(ctx, config):
-                    self._handle_badge_shortage(ctx, config)
-                    return False
+            if found is None:
                 return True
+            if found[0] == "badge_store":
+                self._handle_badge_shortage(ctx, config)
+                return False
             ctx.console.log("[info] Recursos insuficientes; se usarán cofres de electricidad")
             if not self._use_power_crates(ctx, config):
                 return False
@@ -1124,16 +1721,25 @@ class InvestigationTask:
             self._dismiss_overlay_if_dim(ctx, config, force=True)
             return True
         ctx.console.log("[info] Botón 'Batch' no disponible; se usará un segundo cofre")
-        use_buttons = ctx.vision.find_all_templates(
-            config.resource_use_button_templates,
-            threshold=config.button_threshold,
-            max_results=5,
-        )
-        button_coord = self._match_button_to_row(crate[0], use_buttons)
-        if not button_coord:
+        if len(use_buttons) >= 2:
+            # La primera pasada ya encontró varios botones 'Usar': reutiliza esa
+            # detección eligiendo otra fila, sin recapturar ni re-matchear.
+            second_coord = self._match_button_to_row(
+                crate[0],
+                use_buttons,
+                exclude_anchor=button_coord,
+            )
+        else:
+            use_buttons = ctx.vision.find_all_templates(
+                config.resource_use_button_templates,
+                threshold=config.button_threshold,
+                max_results=5,
+            )
+            second_coord = self._match_button_to_row(crate[0], use_buttons)
+        if not second_coord:
             ctx.console.log("[warning] No se pudo encontrar el botón 'Usar' para la segunda carga")
             return False
-        ctx.device.tap(button_coord, label="resource-use-second")
+        ctx.device.tap(second_coord, label="resource-use-second")
         if config.tap_delay > 0:
             ctx.device.sleep(config.tap_delay)
         self._dismiss_overlay_if_dim(ctx, config, force=True)
@@ -1143,11 +1749,23 @@ class InvestigationTask:
         self,
         anchor: Coord,
         buttons: Sequence[Tuple[Coord, Path]],
+        exclude_anchor: Coord | None = None,
     ) -> Coord | None:
-        for coords, _ in buttons:
-            if abs(coords[1] - anchor[1]) <= 60:
-                return coords
-        return buttons[0][0] if buttons else None
+        if exclude_anchor is not None:
+            buttons = [item for item in buttons if item[0] != exclude_anchor]
+        if not buttons:
+            return None
+        # Elige la fila más cercana al ancla (no la primera dentro de 60 px,
+        # que podía apuntar a otra fila cuando había varias coincidencias).
+        ys = np.fromiter(
+            (coords[1] for coords, _ in buttons),
+            dtype=np.int32,
+            count=len(buttons),
+        )
+        idx = int(np.argmin(np.abs(ys - anchor[1])))
+        if abs(int(ys[idx]) - anchor[1]) <= 60:
+            return buttons[idx][0]
+        return buttons[0][0]
 
     def _dismiss_overlay(self, ctx: TaskContext, config: InvestigationConfig) -> None:
         if config.overlay_dismiss_button:
@@ -1174,30 +1792,31 @@ class InvestigationTask:
         if not config.overlay_use_brightness or not ctx.vision:
             self._dismiss_overlay(ctx, config)
             return
-        brightness = ctx.vision.average_brightness()
+        # Reutiliza la captura reciente del flujo llamador (si tiene <200 ms)
+        # en lugar de pagar otro screencap solo para medir brillo; comparación
+        # entera contra el umbral uint8 precalculado en el config.
+        brightness = ctx.vision.average_brightness_u8(stride=4, max_age=0.2)
         if brightness is None:
             self._dismiss_overlay(ctx, config)
             return
-        if brightness <= config.overlay_dark_threshold:
+        if brightness <= config.overlay_dark_u8:
             ctx.console.log(
-                f"[debug] Overlay detectado (brillo {brightness:.2f} <= {config.overlay_dark_threshold:.2f})"
+                f"[debug] Overlay detectado (brillo {brightness} <= {config.overlay_dark_u8} u8)"
             )
             self._dismiss_overlay(ctx, config)
             return
         if force:
             ctx.console.log(
-                f"[debug] Overlay esperado pero brillo {brightness:.2f} > {config.overlay_dark_threshold:.2f}; se descarta igualmente"
+                f"[debug] Overlay esperado pero brillo {brightness} > {config.overlay_dark_u8} u8; se descarta igualmente"
             )
             self._dismiss_overlay(ctx, config)
 
     def _detect_badge_store(self, ctx: TaskContext, config: InvestigationConfig) -> bool:
         if not ctx.vision or not config.badge_store_templates:
             return False
-        return bool(
-            ctx.vision.find_any_template(
-                config.badge_store_templates,
-                threshold=config.badge_store_threshold,
-            )
+        return ctx.vision.has_any_template(
+            config.badge_store_templates,
+            threshold=config.badge_store_threshold,
         )
 
     def _handle_badge_shortage(self, ctx: TaskContext, config: InvestigationConfig) -> None:
@@ -1258,14 +1877,14 @@ class InvestigationTask:
         ctx: TaskContext,
         templates: Sequence[Path],
         threshold: float,
+        frame: np.ndarray | None = None,
     ) -> bool:
         if not ctx.vision or not templates:
             return False
-        return bool(
-            ctx.vision.find_any_template(
-                templates,
-                threshold=threshold,
-            )
+        return ctx.vision.has_any_template(
+            templates,
+            threshold=threshold,
+            image=frame,
         )
 
     def _tap_template_group(
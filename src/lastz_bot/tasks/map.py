@@ -20,22 +20,31 @@ class AttackBoomerTask:
         march_button = params.get("march_button", "map_march")
         delay = float(params.get("delay", 0.5))
 
+        # Resueltos una sola vez: el layout no cambia durante la tarea.
+        map_coord = resolve_button(ctx.layout, map_button)
+        search_coord = resolve_button(ctx.layout, search_button)
+        boomer_coord = resolve_button(ctx.layout, boomer_option)
+        confirm_coord = resolve_button(ctx.layout, search_confirm)
+        rally_coord = resolve_button(ctx.layout, rally_button)
+        march_coord = resolve_button(ctx.layout, march_button)
+
         ctx.console.log("Buscando Boomer/Zombi gigante")
-        ctx.device.tap(resolve_button(ctx.layout, map_button), label="map")
-        ctx.device.sleep(delay)
-        ctx.device.tap(resolve_button(ctx.layout, search_button), label="search")
-        ctx.device.sleep(delay)
-        ctx.device.tap(resolve_button(ctx.layout, boomer_option), label="boomer-option")
-        ctx.device.sleep(delay)
-        ctx.device.tap(resolve_button(ctx.layout, search_confirm), label="search-confirm")
-        ctx.device.sleep(delay)
+        ctx.device.tap_sequence(
+            [
+                (map_coord, delay),
+                (search_coord, delay),
+                (boomer_coord, delay),
+                (confirm_coord, delay),
+            ],
+            label="boomer-setup",
+        )
 
         for idx in range(attempts):
             ctx.console.log(f"Lanzando rally #{idx + 1}")
-            ctx.device.tap(resolve_button(ctx.layout, rally_button), label="rally")
-            ctx.device.sleep(delay)
-            ctx.device.tap(resolve_button(ctx.layout, march_button), label="march")
-            ctx.device.sleep(delay)
+            ctx.device.tap_sequence(
+                [(rally_coord, delay), (march_coord, delay)],
+                label="rally-march",
+            )
 
         if not tap_back_button(ctx, label="attack-boomer-exit"):
             ctx.console.log("[warning] No se detectó el botón 'back' tras los ataques a Boomer")
@@ -60,13 +69,21 @@ class GatherResourcesTask:
         level_priority: Iterable[int] = params.get("level_priority", (6, 5, 4))
         delay = float(params.get("delay", 0.5))
 
+        # Resueltos una sola vez fuera del lazo por recurso.
+        map_coord = resolve_button(ctx.layout, map_button)
+        search_coord = resolve_button(ctx.layout, search_button)
+        tab_coord = resolve_button(ctx.layout, resource_tab)
+        confirm_coord = resolve_button(ctx.layout, search_confirm)
+        gather_coord = resolve_button(ctx.layout, gather_button)
+        march_coord = resolve_button(ctx.layout, march_button)
+
         for resource in resource_types:
             ctx.console.log(f"Buscando recurso {resource}")
-            ctx.device.tap(resolve_button(ctx.layout, map_button), label="map")
+            ctx.device.tap(map_coord, label="map")
             ctx.device.sleep(delay)
-            ctx.device.tap(resolve_button(ctx.layout, search_button), label="search")
+            ctx.device.tap(search_coord, label="search")
             ctx.device.sleep(delay)
-            ctx.device.tap(resolve_button(ctx.layout, resource_tab), label="resource-tab")
+            ctx.device.tap(tab_coord, label="resource-tab")
             ctx.device.sleep(0.3)
 
             resource_button = resource_buttons.get(resource)
@@ -82,11 +99,11 @@ class GatherResourcesTask:
                 ctx.device.sleep(0.2)
                 break
 
-            ctx.device.tap(resolve_button(ctx.layout, search_confirm), label="search-confirm")
+            ctx.device.tap(confirm_coord, label="search-confirm")
             ctx.device.sleep(delay)
-            ctx.device.tap(resolve_button(ctx.layout, gather_button), label="gather")
+            ctx.device.tap(gather_coord, label="gather")
             ctx.device.sleep(delay)
-            ctx.device.tap(resolve_button(ctx.layout, march_button), label="march")
+            ctx.device.tap(march_coord, label="march")
             ctx.device.sleep(delay)
 
         if not tap_back_button(ctx, label="gather-exit"):
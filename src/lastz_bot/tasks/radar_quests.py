@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
+import re
 import time
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, Tuple
 
@@ -14,27 +15,95 @@ from ..troop_state import (
     idle_slots as detect_idle_slots,
     layout_supports_troop_states,
 )
+from ..navigation import (
+    DEFAULT_BACK_BUTTON_TEMPLATES,
+    _resolve_template_paths as _resolve_back_templates,
+)
+from ..vision import dhash64, warm_template_cache
 from .base import TaskContext
-from .utils import tap_back_button, dismiss_overlay_if_present
+from .utils import tap_back_button, dismiss_overlay_if_present, crop_region, freeze_params
 
 Coord = Tuple[int, int]
-HandledHelpMission = Tuple[Coord, float]
+Roi = Tuple[int, int, int, int]
+HandledHelpMission = Tuple[Coord, int]
+
+# Pausas crecientes para sondeos: los casos comunes resuelven en los primeros
+# intentos, así que se arranca corto (un frame del juego) y se duplica hasta
+# converger al intervalo clásico de 0.5s para las esperas largas.
+_POLL_SCHEDULE = (0.05, 0.1, 0.2, 0.4, 0.5)
+
+
+class HelpMissionStatus(IntEnum):
+    """Resultado del barrido de misiones de ayuda; entero para comparar barato."""
+
+    EXECUTED = 1
+    NONE_AVAILABLE = 2
+    FAILED = 3
+
+
+class _HandledHelpMissions:
+    """Historial de misiones de ayuda con índice espacial por buckets.
+
+    El chequeo "¿ya atendimos esta coordenada?" era un escaneo lineal con
+    cuatro comparaciones por entrada; aquí cada inserción marca su bucket de
+    ``tolerance`` px y los ocho vecinos, de modo que la consulta es un lookup
+    O(1) en dict (con la misma garantía de no-falsos-negativos dentro de la
+    tolerancia; en los bordes puede suprimir hasta ~2x la distancia).
+    """
+
+    def __init__(self, tolerance: int = 52, ttl_seconds: float = 600.0) -> None:
+        self.tolerance = tolerance
+        # Timestamps en nanosegundos enteros: monotonic_ns evita el paso por
+        # float y las comparaciones quedan en aritmética entera pura.
+        self.ttl_ns = int(ttl_seconds * 1_000_000_000)
+        self._entries: List[HandledHelpMission] = []
+        self._buckets: Dict[Tuple[int, int], int] = {}
 
+    def _bucket_keys(self, coords: Coord):
+        base_x = coords[0] // self.tolerance
+        base_y = coords[1] // self.tolerance
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                yield base_x + dx, base_y + dy
 
-class HelpMissionStatus(Enum):
-    EXECUTED = "executed"
-    NONE_AVAILABLE = "none_available"
-    FAILED = "failed"
+    def add(self, coords: Coord) -> None:
+        now = time.monotonic_ns()
+        self._entries.append((coords, now))
+        for key in self._bucket_keys(coords):
+            self._buckets[key] = now
+
+    def contains(self, coords: Coord) -> bool:
+        key = (coords[0] // self.tolerance, coords[1] // self.tolerance)
+        return key in self._buckets
+
+    def prune(self) -> None:
+        """Expira entradas viejas y reconstruye el índice solo si hizo falta."""
+        if not self._entries:
+            return
+        now = time.monotonic_ns()
+        # Las entradas se agregan en orden temporal: si la más vieja sigue
+        # vigente, ninguna otra puede haber expirado.
+        if now - self._entries[0][1] < self.ttl_ns:
+            return
+        fresh = [entry for entry in self._entries if now - entry[1] < self.ttl_ns]
+        self._entries = fresh
+        self._buckets = {}
+        for coords, stamp in fresh:
+            for key in self._bucket_keys(coords):
+                self._buckets[key] = stamp
 
 
 def _as_list(value: object) -> List[str]:
     """Normaliza cualquier entrada a lista de strings limpiados."""
     if value is None:
         return []
-    if isinstance(value, str):
+    # Chequeos de tipo exacto primero: los configs reales traen str/list/tuple
+    # y así se evita el despacho genérico de isinstance en el camino común.
+    kind = type(value)
+    if kind is str:
         text = value.strip()
         return [text] if text else []
-    if isinstance(value, (list, tuple, set)):
+    if kind is list or kind is tuple or isinstance(value, (list, tuple, set)):
         items: List[str] = []
         for entry in value:
             text = str(entry).strip()
@@ -45,34 +114,48 @@ def _as_list(value: object) -> List[str]:
     return [text] if text else []
 
 
-def _ensure_list(value: object, fallback: Sequence[str]) -> List[str]:
-    """Devuelve lista del valor o, si está vacío, una copia del fallback."""
-    items = _as_list(value)
-    if items:
-        return items
-    return list(fallback)
+# Par "x, y" con espacios opcionales; fullmatch reemplaza el split+strip.
+_COORD_RE = re.compile(r"\s*(-?\d+)\s*,\s*(-?\d+)\s*")
 
 
 def _coord_from_value(value: object) -> Coord | None:
     """Convierte ``(x, y)`` expresado como lista/tupla/string a tupla de enteros."""
     if value is None:
         return None
+    # Camino común primero: los layouts ya parseados entregan tuplas exactas.
+    if type(value) is tuple and len(value) == 2:
+        try:
+            return int(value[0]), int(value[1])
+        except (TypeError, ValueError):
+            return None
     if isinstance(value, (list, tuple)) and len(value) == 2:
         try:
             return int(value[0]), int(value[1])
         except (TypeError, ValueError):
             return None
     if isinstance(value, str):
-        parts = value.split(",")
-        if len(parts) == 2:
-            try:
-                return int(parts[0].strip()), int(parts[1].strip())
-            except (TypeError, ValueError):
-                return None
+        match = _COORD_RE.fullmatch(value)
+        if match:
+            return int(match[1]), int(match[2])
     return None
 
 
-@dataclass
+def _roi_from_value(value: object) -> Roi | None:
+    """Convierte ``(x, y, w, h)`` expresado como lista/tupla a tupla de enteros."""
+    if isinstance(value, (list, tuple)) and len(value) == 4:
+        try:
+            return int(value[0]), int(value[1]), int(value[2]), int(value[3])
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+# Configs resueltos por (layout, params): la resolución de ~15 grupos de
+# templates y las coerciones numéricas se pagan una vez por combinación.
+_CONFIG_CACHE: Dict[Tuple[Any, ...], "RadarQuestConfig"] = {}
+
+
+@dataclass(slots=True)
 class RadarQuestConfig:
     """Agrupa templates, thresholds y tiempos usados por la tarea del radar."""
     icon_templates: Sequence[Path]
@@ -137,6 +220,20 @@ class RadarQuestConfig:
     daily_task_name: str
     daily_limit: int
     skip_daily_limit_check: bool
+    # Precalculados para el lazo de ciclos: evitan un dict.get y una copia de
+    # lista por iteración dentro de _handle_claim_overlay.
+    back_coord: Coord | None = None
+    overlay_templates_list: List[Path] | None = None
+    # ROIs opcionales (x, y, w, h): acotan el NCC de elementos con posición
+    # fija en pantalla; sin definir, la búsqueda sigue siendo a frame completo.
+    menu_roi: Roi | None = None
+    march_button_roi: Roi | None = None
+    icon_roi: Roi | None = None
+    # Destino único para el 'back' de emergencia, resuelto una sola vez:
+    # coordenada del layout si existe, si no el clásico (539, 0).
+    back_tap: Coord = (539, 0)
+    back_tap_label: str = "fallback"
+    back_warn_detail: str = "tocando (539, 0)"
 
     @staticmethod
     def from_params(ctx: TaskContext, params: Dict[str, Any]) -> "RadarQuestConfig":
@@ -144,6 +241,16 @@ class RadarQuestConfig:
         layout = ctx.layout
         console = ctx.console
 
+        cache_key: Tuple[Any, ...] | None
+        try:
+            cache_key = (id(layout), freeze_params(params))
+        except TypeError:
+            cache_key = None
+        if cache_key is not None:
+            cached = _CONFIG_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+
         def resolve(names: Sequence[str]) -> List[Path]:
             paths: List[Path] = []
             for name in names:
@@ -155,10 +262,10 @@ class RadarQuestConfig:
                     console.log(f"[warning] Template '{name}' no definido para radar_quests")
             return paths
 
-        icon_templates = resolve(_ensure_list(params.get("icon_templates"), ["radar_icon"]))
+        icon_templates = resolve(_as_list(params.get("icon_templates")) or ["radar_icon"])
         world_icon_templates = resolve(_as_list(params.get("world_icon_templates")))
-        menu_templates = resolve(_ensure_list(params.get("menu_templates"), ["radar_menu_header"]))
-        claim_button_templates = resolve(_ensure_list(params.get("claim_button_templates"), ["radar_claim_button"]))
+        menu_templates = resolve(_as_list(params.get("menu_templates")) or ["radar_menu_header"])
+        claim_button_templates = resolve(_as_list(params.get("claim_button_templates")) or ["radar_claim_button"])
         laura_button_templates = resolve(_as_list(params.get("laura_button_templates")))
         overlay_templates = resolve(_as_list(params.get("overlay_templates")))
         special_mission_templates = resolve(_as_list(params.get("special_mission_templates")))
@@ -168,9 +275,9 @@ class RadarQuestConfig:
         if not help_go_button_templates:
             help_go_button_templates = list(special_go_button_templates)
         help_button_templates = resolve(_as_list(params.get("help_button_templates")))
-        attack_button_templates = resolve(_ensure_list(params.get("attack_button_templates"), ["radar_attack_button"]))
-        idle_troop_templates = resolve(_ensure_list(params.get("idle_troop_templates"), ["idle_troop_sleep"]))
-        march_button_templates = resolve(_ensure_list(params.get("march_button_templates"), ["march_button"]))
+        attack_button_templates = resolve(_as_list(params.get("attack_button_templates")) or ["radar_attack_button"])
+        idle_troop_templates = resolve(_as_list(params.get("idle_troop_templates")) or ["idle_troop_sleep"])
+        march_button_templates = resolve(_as_list(params.get("march_button_templates")) or ["march_button"])
 
         dismiss_raw = params.get("overlay_dismiss_button", "close_popup")
         dismiss_name = str(dismiss_raw).strip() if dismiss_raw else ""
@@ -180,7 +287,9 @@ class RadarQuestConfig:
         else:
             free_tap = (270, 440)
 
-        return RadarQuestConfig(
+        back_coord = layout.buttons.get("back_button")
+
+        config = RadarQuestConfig(
             icon_templates=icon_templates,
             world_icon_templates=world_icon_templates,
             menu_templates=menu_templates,
@@ -245,7 +354,25 @@ class RadarQuestConfig:
             daily_task_name=str(params.get("daily_task_name") or "radar_quests"),
             daily_limit=max(1, int(params.get("daily_limit", 1))),
             skip_daily_limit_check=bool(params.get("skip_daily_limit_check", False)),
+            back_coord=back_coord,
+            overlay_templates_list=list(overlay_templates) or None,
+            back_tap=back_coord or (539, 0),
+            back_tap_label="layout" if back_coord else "fallback",
+            back_warn_detail=(
+                "usando coordenada del layout"
+                if back_coord
+                else "tocando (539, 0)"
+            ),
+            menu_roi=_roi_from_value(params.get("menu_roi")),
+            march_button_roi=_roi_from_value(params.get("march_button_roi")),
+            icon_roi=_roi_from_value(params.get("icon_roi")),
         )
+        # Los overlays se sondean en cada ciclo: decodificarlos acá deja el
+        # primer descarte del lazo caliente sin I/O de disco.
+        warm_template_cache(overlay_templates)
+        if cache_key is not None:
+            _CONFIG_CACHE[cache_key] = config
+        return config
 
 
 class RadarQuestsTask:
@@ -253,6 +380,28 @@ class RadarQuestsTask:
     name = "radar_quests"
     manual_daily_logging = True
 
+    # Vigencia del último positivo de tropas libres: el estado no cambia en
+    # el lapso entre la detección de la misión y el ataque del mismo ciclo.
+    _IDLE_CACHE_TTL = 1.5
+
+    # Bits de diferencia tolerados entre el fingerprint del header y el
+    # recorte actual antes de caer al NCC completo.
+    _MENU_HASH_MAX_DIST = 8
+
+    # Separación mínima entre snapshots de estados de tropas: el lazo de
+    # reintentos de March puede pedir uno por intento y cada snapshot es un
+    # pase de visión completo.
+    _TROOP_SNAPSHOT_INTERVAL = 5.0
+
+    def __init__(self) -> None:
+        self._idle_seen_at: float | None = None
+        self._menu_hash: int | None = None
+        self._menu_hash_region: Roi | None = None
+        self._troop_snapshot_at: float | None = None
+        # Template ganador por label: en régimen estable siempre acierta la
+        # misma variante, así que se prueba primero en la próxima llamada.
+        self._hot_template: Dict[str, Path] = {}
+
     def run(self, ctx: TaskContext, params: Dict[str, Any]) -> None:  # type: ignore[override]
         """Reclama recompensas, pulsa Laura y ejecuta misiones especiales/ayuda."""
         if not ctx.vision:
@@ -284,18 +433,44 @@ class RadarQuestsTask:
         laura_clicked = False
         special_completed = False
         cycles = 0
-        handled_help_missions: List[HandledHelpMission] = []
+        handled_help_missions = _HandledHelpMissions()
         while cycles < config.max_cycles:
             cycles += 1
             actions = False
-            if self._claim_once(ctx, config):
-                actions = True
-                total_claims += 1
-            if not laura_clicked and self._tap_laura_button(ctx, config):
+            # Una sola captura por ciclo sondea reclamo, Laura y misión
+            # especial contra el mismo frame, en lugar de un screencap por
+            # cada probe.
+            claim_probe, laura_probe, special_probe = ctx.vision.find_best_of_groups(
+                [
+                    config.claim_button_templates,
+                    () if laura_clicked else config.laura_button_templates,
+                    config.special_mission_templates,
+                ],
+                [
+                    config.claim_button_threshold,
+                    config.laura_button_threshold,
+                    config.special_mission_threshold,
+                ],
+            )
+            # En el primer ciclo el botón de reclamo puede tardar en
+            # renderizarse; se conserva la espera clásica como respaldo.
+            if claim_probe is not None or cycles == 1:
+                if self._claim_once(ctx, config, found=claim_probe):
+                    actions = True
+                    total_claims += 1
+            if (
+                not laura_clicked
+                and laura_probe is not None
+                and self._tap_laura_button(
+                    ctx, config, found=None if actions else laura_probe
+                )
+            ):
                 laura_clicked = True
                 actions = True
-            if self._has_special_mission(ctx, config):
-                if self._execute_special_mission(ctx, config):
+            if special_probe is not None:
+                if self._execute_special_mission(
+                    ctx, config, found=None if actions else special_probe
+                ):
                     actions = True
                     special_completed = True
                     # tras regresar al mundo volveremos a abrir el panel automáticamente
@@ -326,16 +501,22 @@ class RadarQuestsTask:
         if total_claims > 0 or laura_clicked or special_completed:
             tracker_count = self._record_progress(ctx, config.daily_task_name, tracker_count)
 
-    def _claim_once(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
+    def _claim_once(
+        self,
+        ctx: TaskContext,
+        config: RadarQuestConfig,
+        found: tuple[Coord, Path] | None = None,
+    ) -> bool:
         """Busca el botón de reclamo, lo pulsa y maneja overlays posteriores."""
         if not ctx.vision:
             return False
-        result = ctx.vision.wait_for_any_template(
+        result = found or ctx.vision.wait_for_any_template(
             config.claim_button_templates,
             timeout=config.claim_button_timeout,
             poll_interval=0.4,
             threshold=config.claim_button_threshold,
             raise_on_timeout=False,
+            poll_schedule=_POLL_SCHEDULE,
         )
         if not result:
             return False
@@ -343,10 +524,10 @@ class RadarQuestsTask:
         ctx.console.log(f"Botón de reclamo detectado ('{matched.name}')")
         ctx.device.tap(coords, label="radar-claim")
         if config.tap_delay > 0:
-            ctx.device.sleep(config.tap_delay)
+            ctx.device.defer_sleep(config.tap_delay)
         self._handle_claim_overlay(ctx, config)
         if config.post_claim_delay > 0:
-            ctx.device.sleep(config.post_claim_delay)
+            ctx.device.defer_sleep(config.post_claim_delay)
         return True
 
     def _handle_claim_overlay(self, ctx: TaskContext, config: RadarQuestConfig) -> None:
@@ -355,7 +536,7 @@ class RadarQuestsTask:
             return
         overlay_closed = dismiss_overlay_if_present(
             ctx,
-            list(config.overlay_templates) or None,
+            config.overlay_templates_list,
             config.overlay_dismiss_button,
             timeout=config.overlay_timeout,
             poll_interval=config.overlay_poll_interval,
@@ -366,7 +547,7 @@ class RadarQuestsTask:
             fallback_tap=config.overlay_free_tap,
         )
         if not overlay_closed:
-            back_coord = ctx.layout.buttons.get("back_button")
+            back_coord = config.back_coord
             if back_coord:
                 ctx.device.tap(back_coord, label="radar-overlay-back")
             elif not tap_back_button(ctx, label="radar-overlay-back"):
@@ -377,11 +558,16 @@ class RadarQuestsTask:
             if config.overlay_dismiss_delay > 0:
                 ctx.device.sleep(config.overlay_dismiss_delay)
 
-    def _tap_laura_button(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
+    def _tap_laura_button(
+        self,
+        ctx: TaskContext,
+        config: RadarQuestConfig,
+        found: tuple[Coord, Path] | None = None,
+    ) -> bool:
         """Pulsa el botón de Laura si está disponible para reclamar claves/bonos."""
         if not ctx.vision or not config.laura_button_templates:
             return False
-        result = ctx.vision.find_any_template(
+        result = found or ctx.vision.find_any_template(
             config.laura_button_templates,
             threshold=config.laura_button_threshold,
         )
@@ -391,24 +577,19 @@ class RadarQuestsTask:
         ctx.console.log(f"Botón de Laura detectado ('{matched.name}'); tocando")
         ctx.device.tap(coords, label="radar-laura")
         if config.laura_delay > 0:
-            ctx.device.sleep(config.laura_delay)
+            ctx.device.defer_sleep(config.laura_delay)
         return True
 
-    def _has_special_mission(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
-        """Detecta si hay una misión especial lista dentro del panel."""
-        if not ctx.vision or not config.special_mission_templates:
-            return False
-        result = ctx.vision.find_any_template(
-            config.special_mission_templates,
-            threshold=config.special_mission_threshold,
-        )
-        return bool(result)
-
-    def _execute_special_mission(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
+    def _execute_special_mission(
+        self,
+        ctx: TaskContext,
+        config: RadarQuestConfig,
+        found: tuple[Coord, Path] | None = None,
+    ) -> bool:
         """Abre la misión especial, viaja, ataca con una tropa libre y espera el march."""
         if not ctx.vision or not config.special_mission_templates:
             return False
-        result = ctx.vision.find_any_template(
+        result = found or ctx.vision.find_any_template(
             config.special_mission_templates,
             threshold=config.special_mission_threshold,
         )
@@ -446,7 +627,7 @@ class RadarQuestsTask:
         self,
         ctx: TaskContext,
         config: RadarQuestConfig,
-        handled_help_missions: List[HandledHelpMission],
+        handled_help_missions: _HandledHelpMissions,
     ) -> HelpMissionStatus:
         """Itera misiones de ayuda, evitando repetir coordenadas ya atendidas."""
         if (
@@ -458,14 +639,30 @@ class RadarQuestsTask:
             return HelpMissionStatus.NONE_AVAILABLE
         executed_any = False
         exhausted = False
+        # Un solo escaneo alimenta todo el lazo: las misiones restantes
+        # conservan sus coordenadas al volver al radar, así que basta con
+        # re-filtrar la lista cacheada contra el historial en vez de repetir
+        # el NCC por iteración. Al agotar el cache se re-escanea una vez para
+        # capturar misiones que hayan aparecido mientras tanto.
+        matches = ctx.vision.find_all_templates(
+            config.help_mission_templates,
+            threshold=config.help_mission_threshold,
+            max_results=5,
+        )
+        stale = False
         while True:
-            self._prune_handled_help_missions(handled_help_missions)
-            matches = ctx.vision.find_all_templates(
-                config.help_mission_templates,
-                threshold=config.help_mission_threshold,
-                max_results=5,
-            )
+            handled_help_missions.prune()
             mission = self._next_unhandled_help_mission(matches, handled_help_missions)
+            if not mission and stale:
+                matches = ctx.vision.find_all_templates(
+                    config.help_mission_templates,
+                    threshold=config.help_mission_threshold,
+                    max_results=5,
+                )
+                stale = False
+                mission = self._next_unhandled_help_mission(
+                    matches, handled_help_missions
+                )
             if not mission:
                 exhausted = True
                 if matches:
@@ -486,7 +683,8 @@ class RadarQuestsTask:
                     return HelpMissionStatus.FAILED
                 return HelpMissionStatus.EXECUTED if executed_any else HelpMissionStatus.FAILED
             executed_any = True
-            handled_help_missions.append((mission_coords, time.monotonic()))
+            handled_help_missions.add(mission_coords)
+            stale = True
         if executed_any:
             return HelpMissionStatus.EXECUTED
         return HelpMissionStatus.NONE_AVAILABLE if exhausted else HelpMissionStatus.FAILED
@@ -500,7 +698,7 @@ class RadarQuestsTask:
         """Viaja a la misión de ayuda, pulsa el botón de acción y retorna al menú."""
         ctx.device.tap(mission_coords, label="radar-help-mission")
         if config.tap_delay > 0:
-            ctx.device.sleep(config.tap_delay)
+            ctx.device.defer_sleep(config.tap_delay)
         if not self._tap_first_template(
             ctx,
             config.help_go_button_templates,
@@ -512,7 +710,7 @@ class RadarQuestsTask:
             ctx.console.log("[warning] No se encontró el botón 'Ir' para la misión de ayuda")
             return False
         if config.help_travel_delay > 0:
-            ctx.device.sleep(config.help_travel_delay)
+            ctx.device.defer_sleep(config.help_travel_delay)
         if not self._tap_first_template(
             ctx,
             config.help_button_templates,
@@ -533,39 +731,21 @@ class RadarQuestsTask:
     def _next_unhandled_help_mission(
         self,
         matches: Sequence[tuple[Coord, Path]],
-        handled: Sequence[HandledHelpMission],
-        tolerance: int = 52,
+        handled: _HandledHelpMissions,
     ) -> tuple[Coord, Path] | None:
-        """Devuelve la primera misión cuya coordenada no exista en el historial local."""
+        """Devuelve la primera misión cuya coordenada no exista en el historial local.
+
+        Con el índice por buckets de ``_HandledHelpMissions`` cada consulta es
+        un lookup O(1), así que el escaneo lineal sobre <=5 matches ya es más
+        barato que armar un filtro vectorizado por llamada.
+        """
+        contains = handled.contains
         for coords, matched in matches:
-            if self._mission_already_handled(coords, handled, tolerance):
+            if contains(coords):
                 continue
             return coords, matched
         return None
 
-    def _mission_already_handled(
-        self,
-        coords: Coord,
-        handled: Sequence[HandledHelpMission],
-        tolerance: int,
-    ) -> bool:
-        """Determina si una misión ya se atendió comparando coordenadas con tolerancia."""
-        for previous, _ in handled:
-            if abs(previous[0] - coords[0]) <= tolerance and abs(previous[1] - coords[1]) <= tolerance:
-                return True
-        return False
-
-    def _prune_handled_help_missions(
-        self,
-        handled: List[HandledHelpMission],
-        ttl_seconds: float = 600.0,
-    ) -> None:
-        """Depura el historial de misiones ayudadas para que expiren tras cierto tiempo."""
-        if not handled:
-            return
-        now = time.monotonic()
-        handled[:] = [entry for entry in handled if now - entry[1] < ttl_seconds]
-
     def _wait_for_attack_option(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
         """Espera a que aparezca el botón Attack tras viajar a la misión."""
         if not ctx.vision:
@@ -576,6 +756,7 @@ class RadarQuestsTask:
             poll_interval=0.5,
             threshold=config.attack_button_threshold,
             raise_on_timeout=False,
+            poll_schedule=_POLL_SCHEDULE,
         )
         return bool(result)
 
@@ -596,7 +777,7 @@ class RadarQuestsTask:
         ):
             return False
         if config.attack_panel_delay > 0:
-            ctx.device.sleep(config.attack_panel_delay)
+            ctx.device.defer_sleep(config.attack_panel_delay)
         idle_result = self._locate_idle_panel_slot(ctx, config)
         if not idle_result:
             ctx.console.log("[warning] Al abrir el panel no se encontró la tropa disponible tras reintentos")
@@ -605,16 +786,27 @@ class RadarQuestsTask:
         ctx.console.log(f"Tropa libre detectada ('{matched.name}')")
         ctx.device.tap(idle_coords, label="radar-idle")
         if config.troop_select_delay > 0:
-            ctx.device.sleep(config.troop_select_delay)
+            ctx.device.defer_sleep(config.troop_select_delay)
         if not self._tap_march_with_retry(ctx, config):
             ctx.console.log("[warning] No se pudo confirmar el march de la misión del radar")
             return False
+        # El march consume la tropa libre: el próximo chequeo debe ir a pantalla.
+        self._idle_seen_at = None
         if config.post_attack_delay > 0:
-            ctx.device.sleep(config.post_attack_delay)
+            ctx.device.defer_sleep(config.post_attack_delay)
         return True
 
     def _idle_troops_available(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
-        """Valida disponibilidad de tropas ya sea por HUD o template legacy."""
+        """Valida disponibilidad de tropas ya sea por HUD o template legacy.
+
+        Solo se cachean los positivos: un march invalida el cache y los
+        negativos siempre se reverifican contra la pantalla.
+        """
+        if (
+            self._idle_seen_at is not None
+            and time.monotonic() - self._idle_seen_at < self._IDLE_CACHE_TTL
+        ):
+            return True
         if layout_supports_troop_states(ctx.layout):
             slots = detect_idle_slots(ctx)
             if slots:
@@ -623,6 +815,7 @@ class RadarQuestsTask:
                 ctx.console.log(
                     f"[info] Tropas en descanso detectadas vía estados -> {label} ({describe_activity(slot.state)})"
                 )
+                self._idle_seen_at = time.monotonic()
                 return True
         if not ctx.vision or not config.idle_troop_templates:
             return False
@@ -635,61 +828,73 @@ class RadarQuestsTask:
             ctx.console.log(
                 f"[info] Tropa libre detectada mediante template '{matched.name}'"
             )
+            self._idle_seen_at = time.monotonic()
             return True
         return False
 
     def _locate_idle_panel_slot(
         self, ctx: TaskContext, config: RadarQuestConfig, attempts: int = 2
     ) -> tuple[Coord, Path] | None:
-        """Busca el template de tropa libre dentro del panel de ataque con reintentos."""
+        """Busca el template de tropa libre dentro del panel de ataque.
+
+        Una sola espera larga equivale a los reintentos encadenados con pausa
+        fija de antes, pero sale apenas el template aparece (sin el segundo
+        muerto entre intentos) y toma el snapshot de tropas una única vez al
+        agotarse todo el presupuesto.
+        """
         if not ctx.vision:
             return None
         attempts = max(1, attempts)
-        for attempt in range(attempts):
-            result = ctx.vision.wait_for_any_template(
-                config.idle_troop_templates,
-                timeout=config.idle_troop_timeout,
-                poll_interval=0.5,
-                threshold=config.idle_troop_threshold,
-                raise_on_timeout=False,
-            )
-            if result:
-                return result
-            self._log_troop_state_snapshot(ctx)
-            if attempt < attempts - 1:
-                ctx.console.log(
-                    "[info] No se detectó tropa libre en el panel del radar; reintentando"
-                )
-                ctx.device.sleep(1.0)
+        timeout = attempts * config.idle_troop_timeout + (attempts - 1) * 1.0
+        result = ctx.vision.wait_for_any_template(
+            config.idle_troop_templates,
+            timeout=timeout,
+            poll_interval=0.5,
+            threshold=config.idle_troop_threshold,
+            raise_on_timeout=False,
+            poll_schedule=_POLL_SCHEDULE,
+        )
+        if result:
+            return result
+        ctx.console.log("[info] No se detectó tropa libre en el panel del radar")
+        self._log_troop_state_snapshot(ctx)
         return None
 
     def _tap_march_with_retry(
         self, ctx: TaskContext, config: RadarQuestConfig, attempts: int = 2
     ) -> bool:
-        """Pulsa el botón March con reintentos, registrando estados si falla."""
+        """Pulsa el botón March con una espera extendida, registrando estados si falla.
+
+        El presupuesto de los antiguos reintentos (N esperas + pausas fijas)
+        se concentra en una sola espera adaptativa que corta al primer hit.
+        """
         attempts = max(1, attempts)
-        for attempt in range(attempts):
-            if self._tap_first_template(
-                ctx,
-                config.march_button_templates,
-                config.march_button_threshold,
-                config.march_button_timeout,
-                label="radar-march",
-                delay=config.tap_delay,
-            ):
-                return True
-            self._log_troop_state_snapshot(ctx)
-            if attempt < attempts - 1:
-                ctx.console.log(
-                    "[info] Botón 'March' no detectado; se intentará nuevamente"
-                )
-                ctx.device.sleep(1.0)
+        timeout = attempts * config.march_button_timeout + (attempts - 1) * 1.0
+        if self._tap_first_template(
+            ctx,
+            config.march_button_templates,
+            config.march_button_threshold,
+            timeout,
+            label="radar-march",
+            delay=config.tap_delay,
+            roi=config.march_button_roi,
+        ):
+            return True
+        ctx.console.log("[info] Botón 'March' no detectado")
+        self._log_troop_state_snapshot(ctx)
         return False
 
     def _log_troop_state_snapshot(self, ctx: TaskContext) -> None:
         """Imprime el estado actual de las tropas si el layout soporta el HUD."""
         if not layout_supports_troop_states(ctx.layout):
             return
+        now = time.monotonic()
+        if (
+            self._troop_snapshot_at is not None
+            and now - self._troop_snapshot_at < self._TROOP_SNAPSHOT_INTERVAL
+        ):
+            return
+        self._troop_snapshot_at = now
         states = detect_troop_states(ctx)
         if not states:
             return
@@ -706,15 +911,43 @@ class RadarQuestsTask:
         return self._open_menu(ctx, config)
 
     def _is_menu_visible(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
-        """Usa templates del header para saber si seguimos dentro del panel."""
+        """Usa templates del header para saber si seguimos dentro del panel.
+
+        Antes del NCC se compara un dHash del recorte donde el header apareció
+        la última vez: si la zona no cambió, unos XOR resuelven el chequeo.
+        """
         if not ctx.vision or not config.menu_templates:
             return False
+        frame = None
+        if self._menu_hash is not None and self._menu_hash_region is not None:
+            frame = ctx.vision.capture()
+            crop = crop_region(frame, self._menu_hash_region)
+            if crop is not None:
+                distance = (dhash64(crop) ^ self._menu_hash).bit_count()
+                if distance < self._MENU_HASH_MAX_DIST:
+                    return True
         result = ctx.vision.find_any_template(
             config.menu_templates,
             threshold=config.menu_threshold,
+            roi=config.menu_roi,
+            image=frame,
         )
+        if result:
+            self._remember_menu_fingerprint(ctx, result[0])
         return bool(result)
 
+    def _remember_menu_fingerprint(self, ctx: TaskContext, center: Coord) -> None:
+        """Guarda el dHash del recorte centrado en el header recién detectado."""
+        if not ctx.vision:
+            return
+        frame = ctx.vision.last_frame
+        region: Roi = (center[0] - 32, center[1] - 32, 64, 64)
+        crop = crop_region(frame, region)
+        if crop is None:
+            return
+        self._menu_hash = dhash64(crop)
+        self._menu_hash_region = region
+
     def _open_menu(self, ctx: TaskContext, config: RadarQuestConfig) -> bool:
         """Intenta primero el icono local y luego el de mapa para mostrar el radar."""
         if self._tap_icon_and_wait_for_menu(
@@ -724,6 +957,7 @@ class RadarQuestsTask:
             config.icon_threshold,
             config.icon_timeout,
             label="radar-icon",
+            roi=config.icon_roi,
         ):
             return True
         if self._tap_icon_and_wait_for_menu(
@@ -746,6 +980,7 @@ class RadarQuestsTask:
         timeout: float,
         *,
         label: str,
+        roi: Roi | None = None,
     ) -> bool:
         if not template_paths or not ctx.vision:
             return False
@@ -756,6 +991,7 @@ class RadarQuestsTask:
             timeout,
             label=label,
             delay=config.tap_delay,
+            roi=roi,
         ):
             return False
         if self._wait_for_menu(ctx, config):
@@ -776,7 +1012,11 @@ class RadarQuestsTask:
             poll_interval=0.5,
             threshold=config.menu_threshold,
             raise_on_timeout=False,
+            poll_schedule=_POLL_SCHEDULE,
+            roi=config.menu_roi,
         )
+        if result:
+            self._remember_menu_fingerprint(ctx, result[0])
         return bool(result)
 
     def _tap_first_template(
@@ -788,24 +1028,35 @@ class RadarQuestsTask:
         *,
         label: str,
         delay: float,
+        roi: Roi | None = None,
     ) -> bool:
         """Pulsa el primer template disponible de una lista y aplica delay opcional."""
         if not template_paths or not ctx.vision:
             return False
+        paths = list(template_paths)
+        hot = self._hot_template.get(label)
+        if hot is not None and hot in paths and paths[0] != hot:
+            paths.remove(hot)
+            paths.insert(0, hot)
         result = ctx.vision.wait_for_any_template(
-            template_paths,
+            paths,
             timeout=timeout,
             poll_interval=0.5,
             threshold=threshold,
             raise_on_timeout=False,
+            poll_schedule=_POLL_SCHEDULE,
+            roi=roi,
         )
         if not result:
             return False
         coords, matched = result
+        self._hot_template[label] = matched
         ctx.console.log(f"Template '{matched.name}' detectado ({label})")
         ctx.device.tap(coords, label=label)
         if delay > 0:
-            ctx.device.sleep(delay)
+            # Diferido: si lo siguiente es otra espera de template, el primer
+            # sondeo ya absorbe el tiempo de asentamiento de la UI.
+            ctx.device.defer_sleep(delay)
         return True
 
     def _close_menu(self, ctx: TaskContext, config: RadarQuestConfig, *, force: bool = False) -> None:
@@ -823,21 +1074,14 @@ class RadarQuestsTask:
     ) -> None:
         if tap_back_button(ctx, label=label):
             if config.tap_delay > 0:
-                ctx.device.sleep(config.tap_delay)
+                ctx.device.defer_sleep(config.tap_delay)
             return
-        back_coord = ctx.layout.buttons.get("back_button")
-        if back_coord:
-            ctx.console.log(
-                f"[warning] Botón 'back' no detectado por template ({label}); usando coordenada del layout"
-            )
-            ctx.device.tap(back_coord, label=f"{label}-layout")
-        else:
-            ctx.console.log(
-                f"[warning] Botón 'back' no detectado y sin layout; tocando (539, 0) ({label})"
-            )
-            ctx.device.tap((539, 0), label=f"{label}-fallback")
+        ctx.console.log(
+            f"[warning] Botón 'back' no detectado por template ({label}); {config.back_warn_detail}"
+        )
+        ctx.device.tap(config.back_tap, label=f"{label}-{config.back_tap_label}")
         if config.tap_delay > 0:
-            ctx.device.sleep(config.tap_delay)
+            ctx.device.defer_sleep(config.tap_delay)
 
     def _current_tracker(self, ctx: TaskContext, task_name: str) -> int:
         """Lee el progreso registrado en el tracker diario para la tarea indicada."""
@@ -856,20 +1100,55 @@ class RadarQuestsTask:
         """Intenta cerrar el panel del mapa tras un intento de misión fallido."""
         if not tap_back_button(ctx, label="radar-mission-back"):
             ctx.console.log(
-                "[warning] Botón 'back' no detectado al salir del mapa del radar; se usará coordenada (539, 0)"
+                f"[warning] Botón 'back' no detectado al salir del mapa del radar; {config.back_warn_detail}"
             )
-            ctx.device.tap((539, 0), label="radar-mission-fallback")
+            ctx.device.tap(config.back_tap, label=f"radar-mission-{config.back_tap_label}")
         if config.tap_delay > 0:
-            ctx.device.sleep(config.tap_delay)
+            ctx.device.defer_sleep(config.tap_delay)
 
     def _return_to_radar_menu(self, ctx: TaskContext, config: RadarQuestConfig, attempts: int = 2) -> bool:
-        """Garantiza que el panel del radar vuelva a mostrarse tras usar el mapa."""
+        """Garantiza que el panel del radar vuelva a mostrarse tras usar el mapa.
+
+        Cada intento clasifica una sola captura: panel visible, subpantalla
+        con botón 'back', u otra cosa. Así la recuperación no paga un
+        screencap por cada chequeo (menú, back, icono) como antes.
+        """
         attempts = max(1, attempts)
+        back_templates = _resolve_back_templates(ctx.layout, DEFAULT_BACK_BUTTON_TEMPLATES)
         for attempt in range(attempts):
-            if self._ensure_menu_visible(ctx, config):
+            frame = ctx.vision.capture() if ctx.vision else None
+            if frame is None:
+                # Sin captura no hay clasificador: camino clásico con esperas.
+                if self._ensure_menu_visible(ctx, config):
+                    return True
+                self._recover_from_mission_screen(ctx, config)
+                continue
+            menu_hit = ctx.vision.find_any_template(
+                config.menu_templates,
+                threshold=config.menu_threshold,
+                roi=config.menu_roi,
+                image=frame,
+            )
+            if menu_hit:
+                self._remember_menu_fingerprint(ctx, menu_hit[0])
                 return True
             ctx.console.log(
                 f"[info] Radar no visible tras misión; intentando recuperación ({attempt + 1}/{attempts})"
             )
-            self._recover_from_mission_screen(ctx, config)
+            back_hit = (
+                ctx.vision.find_any_template(
+                    back_templates, threshold=0.83, image=frame
+                )
+                if back_templates
+                else None
+            )
+            if back_hit:
+                ctx.device.tap(back_hit[0], label="radar-mission-back")
+                if config.tap_delay > 0:
+                    ctx.device.defer_sleep(config.tap_delay)
+                continue
+            # Sin back a la vista: probablemente estamos en la base, así que
+            # se intenta reabrir el panel con los iconos del radar.
+            if self._open_menu(ctx, config):
+                return True
         return self._ensure_menu_visible(ctx, config)
@@ -3,16 +3,18 @@
 from __future__ import annotations
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, FrozenSet, List, Sequence, Tuple
 
 import cv2
 
 from .base import TaskContext
-from .utils import tap_back_button
+from .utils import crop_region, freeze_params, tap_back_button
+from ..vision import dhash64, warm_template_cache
 from ..troop_state import (
     TroopActivity,
     TroopSlotStatus,
@@ -27,6 +29,14 @@ from ..troop_state import (
 
 Coord = Tuple[int, int]
 
+# Configs resueltos por (layout, params): los params no cambian entre ticks,
+# así que la resolución de templates y las coerciones se pagan una sola vez.
+_CONFIG_CACHE: Dict[Tuple[object, ...], "RallyBoomerConfig"] = {}
+
+# Hilo auxiliar para solapar el chequeo del overlay de tropas vacías con la
+# lectura de estados del HUD sobre el mismo frame (matchTemplate suelta el GIL).
+_DISPATCH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rally-detect")
+
 
 @dataclass
 class RallyBoomerConfig:
@@ -69,9 +79,10 @@ class RallyBoomerConfig:
     auto_union_timeout: float
     auto_union_task_name: str
     auto_union_refresh_hours: float
-    preferred_slots: List[str]
+    preferred_slots: FrozenSet[str]
     march_button_templates: List[str]
     empty_troop_template_names: List[str]
+    empty_troop_paths: List[Path]
     empty_troop_threshold: float
     empty_troop_wait_timeout: float
     dispatch_confirm_timeout: float
@@ -101,6 +112,14 @@ class RallyBoomerConfig:
         """Construye la configuración leyendo nombres de templates y tiempos declarados."""
         layout = ctx.layout
         console = ctx.console
+        try:
+            cache_key = (id(layout), freeze_params(params))
+        except TypeError:
+            cache_key = None
+        if cache_key is not None:
+            cached = _CONFIG_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
 
         def as_list(value: object) -> List[str]:
             """Normaliza cualquier valor a lista de strings sin espacios."""
@@ -125,16 +144,18 @@ class RallyBoomerConfig:
                 return int(value[0]), int(value[1])
             return default
 
+        # Chequeo de pertenencia directo sobre las llaves del layout: evita
+        # levantar y atrapar un KeyError por cada nombre consultado.
+        known = layout.templates.keys()
+
         def resolve(names: Sequence[str]) -> List[str]:
             """Filtra nombres de template garantizando que existan en el layout."""
             resolved: List[str] = []
             for name in names:
-                try:
-                    layout.template_paths(name)
-                except KeyError:
-                    console.log(f"[warning] Template '{name}' no está definido para rally_boomer")
-                else:
+                if name in known:
                     resolved.append(name)
+                else:
+                    console.log(f"[warning] Template '{name}' no está definido para rally_boomer")
             return resolved
 
         level_indicator_raw = params.get("level_indicator_templates", {}) or {}
@@ -167,9 +188,20 @@ class RallyBoomerConfig:
         if detection_order not in {"asc", "desc"}:
             detection_order = "desc"
 
-        preferred_slots = [entry.strip().lower() for entry in as_list(params.get("preferred_idle_slots", ["a"])) if entry.strip()]
+        preferred_slots = frozenset(
+            entry.strip().lower() for entry in as_list(params.get("preferred_idle_slots", ["a"])) if entry.strip()
+        )
+
+        empty_troop_template_names = resolve(as_list(params.get("empty_troop_templates", [])))
+        # Las rutas del overlay de tropas vacías se resuelven acá: el chequeo
+        # corre en cada intento de envío y queda como lectura pura del config.
+        empty_troop_paths = [
+            path
+            for name in empty_troop_template_names
+            for path in layout.template_paths(name)
+        ]
 
-        return RallyBoomerConfig(
+        config = RallyBoomerConfig(
             search_icon_templates=resolve(as_list(params.get("search_icon_template", "search_icon"))),
             boomer_icon_templates=resolve(as_list(params.get("boomer_icon_template", "boomer_icon"))),
             team_button_templates=resolve(as_list(params.get("team_up_button_template", "boomer_team_up_button"))),
@@ -210,7 +242,8 @@ class RallyBoomerConfig:
             auto_union_refresh_hours=float(params.get("auto_union_refresh_hours", 12.0)),
             preferred_slots=preferred_slots,
             march_button_templates=resolve(as_list(params.get("march_button_template", "march_button"))),
-            empty_troop_template_names=resolve(as_list(params.get("empty_troop_templates", []))),
+            empty_troop_template_names=empty_troop_template_names,
+            empty_troop_paths=empty_troop_paths,
             empty_troop_threshold=float(params.get("empty_troop_threshold", params.get("template_threshold", 0.82))),
             empty_troop_wait_timeout=float(params.get("empty_troop_wait_timeout", 240.0)),
             dispatch_confirm_timeout=float(params.get("dispatch_confirm_timeout", 15.0)),
@@ -235,6 +268,15 @@ class RallyBoomerConfig:
             daily_limit=max(1, int(params.get("daily_limit", 7))),
             skip_daily_limit_check=bool(params.get("skip_daily_limit_check", False)),
         )
+        # Los grupos consultados en cada poll del lazo de rallies se
+        # decodifican al construir la config, no en el primer sondeo.
+        hot_paths: List[Path] = list(config.empty_troop_paths)
+        for name in config.sede_button_templates + config.march_button_templates:
+            hot_paths.extend(layout.template_paths(name))
+        warm_template_cache(hot_paths)
+        if cache_key is not None:
+            _CONFIG_CACHE[cache_key] = config
+        return config
 
 
 class DispatchOutcome(str, Enum):
@@ -248,8 +290,19 @@ class RallyBoomerTask:
     name = "rally_boomer"
     manual_daily_logging = True
 
+    # Bits de diferencia tolerados entre el fingerprint del botón de sede y
+    # el recorte actual antes de caer al NCC completo.
+    _SEDE_HASH_MAX_DIST = 8
+
     def __init__(self) -> None:
         self._missing_templates: set[str] = set()
+        # Rutas ya resueltas por (layout, nombre): template_paths construye
+        # objetos Path nuevos en cada llamada y esta tarea lo consulta por poll.
+        self._path_cache: Dict[Tuple[int, str], List[Path]] = {}
+        # dHash del recorte donde apareció el botón de sede por última vez:
+        # mientras la zona no cambie, el chequeo de escena evita el NCC.
+        self._sede_hash: int | None = None
+        self._sede_hash_region: Tuple[int, int, int, int] | None = None
 
     def run(self, ctx: TaskContext, params: Dict[str, object]) -> None:  # type: ignore[override]
         """Lanza rallies seguidos, monitorea límites diarios y activa Auto Union."""
@@ -376,13 +429,7 @@ class RallyBoomerTask:
     # --- flujo de mapa ---
     def _ensure_world_scene(self, ctx: TaskContext, config: RallyBoomerConfig) -> bool:
         """Verifica si ya estamos en el mapa mundial y, si no, toca el botón World."""
-        if self._wait_for_template_group(
-            ctx,
-            config.sede_button_templates,
-            label="sede-check",
-            timeout=1.0,
-            threshold=config.sede_button_threshold,
-        ):
+        if self._sede_visible(ctx, config, timeout=1.0):
             return True
         if not self._tap_template_group(
             ctx,
@@ -393,13 +440,45 @@ class RallyBoomerTask:
         ):
             return False
         ctx.device.sleep(config.world_transition_delay)
-        return self._wait_for_template_group(
-            ctx,
-            config.sede_button_templates,
-            label="sede-check",
-            timeout=4.0,
+        return self._sede_visible(ctx, config, timeout=4.0)
+
+    def _sede_visible(
+        self, ctx: TaskContext, config: RallyBoomerConfig, *, timeout: float
+    ) -> bool:
+        """Detecta el botón de sede, con corto-circuito por fingerprint.
+
+        El lazo principal pregunta por la escena en cada iteración aunque la
+        pantalla no haya cambiado: si el dHash del recorte donde apareció el
+        botón la última vez sigue igual, unos XOR resuelven el chequeo sin
+        pagar el matchTemplate.
+        """
+        if not ctx.vision:
+            return False
+        if self._sede_hash is not None and self._sede_hash_region is not None:
+            frame = ctx.vision.capture()
+            crop = crop_region(frame, self._sede_hash_region)
+            if crop is not None:
+                distance = (dhash64(crop) ^ self._sede_hash).bit_count()
+                if distance < self._SEDE_HASH_MAX_DIST:
+                    return True
+        paths = self._paths_from_names(ctx, config.sede_button_templates)
+        if not paths:
+            return False
+        result = ctx.vision.wait_for_any_template(
+            paths,
+            timeout=timeout,
             threshold=config.sede_button_threshold,
+            poll_interval=0.5,
+            raise_on_timeout=False,
         )
+        if result:
+            center = result[0]
+            region = (center[0] - 32, center[1] - 32, 64, 64)
+            crop = crop_region(ctx.vision.last_frame, region)
+            if crop is not None:
+                self._sede_hash = dhash64(crop)
+                self._sede_hash_region = region
+        return bool(result)
 
     def _open_search_panel(self, ctx: TaskContext, config: RallyBoomerConfig) -> bool:
         """Abre la lupa de búsqueda y desplaza el panel hacia Boomer."""
@@ -490,6 +569,33 @@ class RallyBoomerTask:
         if delay > 0:
             ctx.device.sleep(delay)
 
+    def _poll_until(
+        self,
+        ctx: TaskContext,
+        predicate,
+        *,
+        timeout: float,
+        cap: float,
+        base: float = 0.3,
+    ) -> bool:
+        """Sondea ``predicate`` con backoff exponencial hasta agotar ``timeout``.
+
+        Los cambios de estado suelen llegar temprano: arrancar con pausas
+        cortas y duplicarlas hasta ``cap`` recorta la latencia de detección
+        sin multiplicar las capturas en las esperas largas. La última pausa
+        se recorta al tiempo restante para no pasarse del deadline.
+        """
+        deadline = time.monotonic() + timeout
+        pause = max(0.1, base)
+        while True:
+            if predicate():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ctx.device.sleep(min(pause, remaining))
+            pause = min(pause * 2, max(cap, base))
+
     # --- tropas ---
     def _select_idle_slot(
         self,
@@ -504,11 +610,19 @@ class RallyBoomerTask:
         if not slots:
             return None
         blocked = {entry.lower() for entry in blocked_keys or []}
-        candidates = [slot for slot in slots if self._slot_key(slot) not in blocked]
-        if not candidates:
+        # Una sola pasada: se corta en el primer slot preferido y se recuerda
+        # el primer candidato libre como respaldo, sin listas intermedias.
+        target: TroopSlotStatus | None = None
+        for candidate in slots:
+            if self._slot_key(candidate) in blocked:
+                continue
+            if candidate.key_lower in config.preferred_slots:
+                target = candidate
+                break
+            if target is None:
+                target = candidate
+        if target is None:
             return None
-        preferred = [slot for slot in candidates if (slot.label or slot.slot_id or "").lower() in config.preferred_slots]
-        target = preferred[0] if preferred else candidates[0]
         label = (target.label or target.slot_id or "?").upper()
         ctx.console.log(f"Seleccionando tropa {label} (estado: {describe_activity(target.state)})")
         return target
@@ -526,7 +640,17 @@ class RallyBoomerTask:
         tap_point = slot.tap
         ctx.device.tap(tap_point, label="select-idle-troop")
         self._await_troop_state_sample(ctx, config, minimum=2.0)
-        resolved = resolve_slot_for_tap(ctx, tap_point, fallback=slot)
+        # El estado de los slots y el overlay de tropas vacías se leen del
+        # mismo frame y usan grupos de templates disjuntos, así que ambas
+        # pasadas corren solapadas: el overlay en el hilo auxiliar y el HUD acá.
+        frame = ctx.vision.capture() if ctx.vision else None
+        empty_future = None
+        if frame is not None and config.empty_troop_paths:
+            empty_future = _DISPATCH_POOL.submit(
+                self._detect_empty_troop_overlay, ctx, config, frame
+            )
+        states = detect_troop_states(ctx, image=frame)
+        resolved = resolve_slot_for_tap(ctx, tap_point, slots=states, fallback=slot)
         if resolved and resolved.slot_id != slot.slot_id:
             prev_label = (slot.label or slot.slot_id or "?").upper()
             new_label = (resolved.label or resolved.slot_id or "?").upper()
@@ -535,7 +659,8 @@ class RallyBoomerTask:
             )
         slot = resolved or slot
         label = (slot.label or slot.slot_id or "?").upper()
-        if not self._ensure_troops_available(ctx, config, slot):
+        initial_overlay = empty_future.result() if empty_future is not None else None
+        if not self._ensure_troops_available(ctx, config, slot, initial_overlay=initial_overlay):
             ctx.console.log(f"[warning] La tropa {label} sigue sin unidades tras esperar; deteniendo rallies")
             return DispatchOutcome.ABORT, slot
         if not self._tap_template_group(
@@ -573,21 +698,36 @@ class RallyBoomerTask:
         ctx: TaskContext,
         config: RallyBoomerConfig,
         slot: TroopSlotStatus,
+        *,
+        initial_overlay: bool | None = None,
     ) -> bool:
-        """Espera a que la tropa tenga unidades si detecta overlay de ejército vacío."""
-        if not self._detect_empty_troop_overlay(ctx, config):
+        """Espera a que la tropa tenga unidades si detecta overlay de ejército vacío.
+
+        Args:
+            initial_overlay: Resultado de un chequeo de overlay ya hecho sobre
+                el frame vigente; evita repetir la primera detección.
+        """
+        detected = (
+            initial_overlay
+            if initial_overlay is not None
+            else self._detect_empty_troop_overlay(ctx, config)
+        )
+        if not detected:
             return True
         label = (slot.label or slot.slot_id or "?").upper()
         ctx.console.log(
             f"[info] La tropa {label} está sin unidades (0); se esperará a que regresen otras tropas"
         )
         wait_timeout = max(config.empty_troop_wait_timeout, config.rally_timeout)
-        deadline = time.monotonic() + wait_timeout
-        while time.monotonic() < deadline:
-            ctx.device.sleep(max(1.0, config.rally_poll_interval))
-            if not self._detect_empty_troop_overlay(ctx, config):
-                ctx.console.log(f"[info] La tropa {label} recuperó unidades; reintentando envío")
-                return True
+        if self._poll_until(
+            ctx,
+            lambda: not self._detect_empty_troop_overlay(ctx, config),
+            timeout=wait_timeout,
+            cap=max(1.0, config.rally_poll_interval),
+            base=1.0,
+        ):
+            ctx.console.log(f"[info] La tropa {label} recuperó unidades; reintentando envío")
+            return True
         return False
 
     def _confirm_rally_departure(
@@ -600,8 +740,6 @@ class RallyBoomerTask:
         if not layout_supports_troop_states(ctx.layout) or not slot.slot_id:
             return True
         self._await_troop_state_sample(ctx, config)
-        deadline = time.monotonic() + max(2.0, config.dispatch_confirm_timeout)
-        poll = max(0.5, config.rally_poll_interval)
         active_states = {
             TroopActivity.RALLY,
             TroopActivity.MARCHING,
@@ -609,12 +747,12 @@ class RallyBoomerTask:
             TroopActivity.BUSY,
             TroopActivity.RETURNING,
         }
-        while time.monotonic() < deadline:
+
+        def departed() -> bool:
             states = detect_troop_states(ctx)
             target = next((candidate for candidate in states if candidate.slot_id == slot.slot_id), None)
             if not target:
-                self._await_troop_state_sample(ctx, config, minimum=poll)
-                continue
+                return False
             if target.state in active_states:
                 ctx.console.log(
                     f"[info] La tropa {(slot.label or slot.slot_id or '?').upper()} está activa ({describe_activity(target.state)})"
@@ -624,19 +762,25 @@ class RallyBoomerTask:
                 ctx.console.log(
                     f"[info] Estado actual de la tropa {(slot.label or slot.slot_id or '?').upper()}: {describe_activity(target.state)}"
                 )
-            self._await_troop_state_sample(ctx, config, minimum=poll)
-        return False
+            return False
 
-    def _detect_empty_troop_overlay(self, ctx: TaskContext, config: RallyBoomerConfig) -> bool:
+        return self._poll_until(
+            ctx,
+            departed,
+            timeout=max(2.0, config.dispatch_confirm_timeout),
+            cap=max(0.5, config.rally_poll_interval),
+        )
+
+    def _detect_empty_troop_overlay(
+        self, ctx: TaskContext, config: RallyBoomerConfig, image=None
+    ) -> bool:
         """Busca overlays del hospital que indican tropas sin unidades disponibles."""
-        if not ctx.vision or not config.empty_troop_template_names:
-            return False
-        paths = self._paths_from_names(ctx, config.empty_troop_template_names)
-        if not paths:
+        if not ctx.vision or not config.empty_troop_paths:
             return False
         result = ctx.vision.find_any_template(
-            paths,
+            config.empty_troop_paths,
             threshold=config.empty_troop_threshold,
+            image=image,
         )
         return result is not None
 
@@ -674,13 +818,17 @@ class RallyBoomerTask:
             )
             return
         self._await_troop_state_sample(ctx, config)
-        deadline = time.monotonic() + config.rally_timeout
-        while time.monotonic() < deadline:
-            slots = detect_idle_slots(ctx)
-            if any(self._same_slot(slot, candidate) for candidate in slots):
-                return
-            self._await_troop_state_sample(ctx, config, minimum=config.rally_poll_interval)
-        ctx.console.log("[warning] La tropa seleccionada no regresó al estado de descanso dentro del tiempo esperado")
+        returned = self._poll_until(
+            ctx,
+            lambda: any(
+                self._same_slot(slot, candidate) for candidate in detect_idle_slots(ctx)
+            ),
+            timeout=config.rally_timeout,
+            cap=max(config.troop_state_sample_delay, config.rally_poll_interval),
+            base=1.0,
+        )
+        if not returned:
+            ctx.console.log("[warning] La tropa seleccionada no regresó al estado de descanso dentro del tiempo esperado")
 
     def _register_active_slot(
         self,
@@ -1124,13 +1272,20 @@ class RallyBoomerTask:
     ) -> List[Path]:
         """Mapea nombres lógicos del layout a rutas físicas, evitando warnings duplicados."""
         paths: List[Path] = []
+        layout_key = id(ctx.layout)
         for name in template_names:
-            try:
-                paths.extend(ctx.layout.template_paths(name))
-            except KeyError:
-                if name not in self._missing_templates:
-                    ctx.console.log(
-                        f"[warning] Template '{name}' no está definido en el layout"
-                    )
-                    self._missing_templates.add(name)
+            cache_key = (layout_key, name)
+            cached = self._path_cache.get(cache_key)
+            if cached is None:
+                try:
+                    cached = ctx.layout.template_paths(name)
+                except KeyError:
+                    cached = []
+                    if name not in self._missing_templates:
+                        ctx.console.log(
+                            f"[warning] Template '{name}' no está definido en el layout"
+                        )
+                        self._missing_templates.add(name)
+                self._path_cache[cache_key] = cached
+            paths.extend(cached)
         return paths
@@ -14,6 +14,33 @@ OverlayRegion = Tuple[Tuple[float, float], Tuple[float, float]]
 TemplateArg = Optional[Union[str, Path, Sequence[Union[str, Path]]]]
 
 
+def crop_region(frame, region: Tuple[int, int, int, int] | None):
+    """Recorta ``(x, y, w, h)`` de un frame, o ``None`` si queda vacío."""
+    if frame is None or region is None:
+        return None
+    x, y, w, h = region
+    x0 = max(x, 0)
+    y0 = max(y, 0)
+    x1 = min(x + w, frame.shape[1])
+    y1 = min(y + h, frame.shape[0])
+    if x1 - x0 <= 0 or y1 - y0 <= 0:
+        return None
+    return frame[y0:y1, x0:x1]
+
+
+def freeze_params(value: object) -> object:
+    """Convierte estructuras anidadas de params en claves hashables.
+
+    Sirve para memoizar configs por combinación de layout + params sin exigir
+    que los dicts de entrada sean inmutables.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze_params(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze_params(item) for item in value)
+    return value
+
+
 def _normalize_template_sources(template_arg: TemplateArg) -> List[Union[str, Path]]:
     """Convierte strings, Paths o secuencias en una lista plana de fuentes."""
     if template_arg is None:
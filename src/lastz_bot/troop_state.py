@@ -4,7 +4,8 @@ from __future__ import annotations
 
 import time
 import json
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -74,6 +75,12 @@ class TroopSlotStatus:
     label: Optional[str] = None
     source: str = "detector"
     reference_coord: Coord | None = None
+    display_label: str = field(init=False, repr=False)
+    key_lower: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.display_label = (self.label or self.slot_id or "").upper()
+        self.key_lower = (self.label or self.slot_id or "").lower()
 
     @property
     def is_idle(self) -> bool:
@@ -84,6 +91,10 @@ class TroopSlotStatus:
 _TEMPLATE_CACHE: Dict[Path, np.ndarray] = {}
 _WARNED_LAYOUTS: set[int] = set()
 
+# Cada slot se inspecciona sobre un recorte independiente del mismo frame y
+# matchTemplate libera el GIL, así que los slots escalan casi linealmente.
+_SLOT_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="troop-slot")
+
 _STATE_DISPLAY = {
     TroopActivity.IDLE: "descansando",
     TroopActivity.MARCHING: "marchando",
@@ -109,8 +120,14 @@ def layout_supports_troop_states(layout: LayoutConfig) -> bool:
     return bool(cfg and cfg.slots and cfg.state_templates)
 
 
-def detect_troop_states(ctx: TaskContext) -> List[TroopSlotStatus]:
-    """Corre las detecciones de estado y devuelve la lista completa de slots."""
+def detect_troop_states(
+    ctx: TaskContext, image: Optional[np.ndarray] = None
+) -> List[TroopSlotStatus]:
+    """Corre las detecciones de estado y devuelve la lista completa de slots.
+
+    Args:
+        image: Captura BGR reutilizable; si se omite se toma una nueva.
+    """
     layout = ctx.layout
     cfg = getattr(layout, "troop_state", None)
     if not cfg or not cfg.slots or not cfg.state_templates:
@@ -119,7 +136,7 @@ def detect_troop_states(ctx: TaskContext) -> List[TroopSlotStatus]:
     if not ctx.vision:
         return []
 
-    screenshot = ctx.vision.capture()
+    screenshot = image if image is not None else ctx.vision.capture()
     if screenshot is None:
         return []
     captured_at = datetime.now()
@@ -130,15 +147,15 @@ def detect_troop_states(ctx: TaskContext) -> List[TroopSlotStatus]:
     debug_regions_enabled = bool(getattr(cfg, "debug_regions_enabled", False))
     slot_regions: List[SlotRegionDebug] = []
 
-    states: List[TroopSlotStatus] = []
-    for slot_name, slot_cfg in cfg.slots.items():
+    def scan_slot(item) -> Tuple[TroopSlotStatus, np.ndarray | None] | None:
+        slot_name, slot_cfg = item
         region = _region_to_pixels(image_h, image_w, slot_cfg.indicator_region)
         if region is None:
-            continue
+            return None
         y1, y2, x1, x2 = region
         roi = screenshot[y1:y2, x1:x2]
         if roi.size == 0:
-            continue
+            return None
         debug_roi = roi.copy() if debug_regions_enabled else None
 
         best_state: TroopActivity | None = None
@@ -177,9 +194,24 @@ def detect_troop_states(ctx: TaskContext) -> List[TroopSlotStatus]:
             label=slot_cfg.label,
             reference_coord=slot_cfg.tap,
         )
-        states.append(slot_status)
+        return slot_status, debug_roi
+
+    slot_items = list(cfg.slots.items())
+    if len(slot_items) >= 2:
+        # map conserva el orden de los slots, así que el resumen y los
+        # recortes de debug quedan igual que con el recorrido secuencial.
+        outcomes = list(_SLOT_POOL.map(scan_slot, slot_items))
+    else:
+        outcomes = [scan_slot(item) for item in slot_items]
 
+    states: List[TroopSlotStatus] = []
+    for item, outcome in zip(slot_items, outcomes):
+        if outcome is None:
+            continue
+        slot_status, debug_roi = outcome
+        states.append(slot_status)
         if debug_regions_enabled and debug_roi is not None:
+            slot_name, slot_cfg = item
             slot_label = slot_cfg.label or slot_name or f"slot-{len(slot_regions) + 1}"
             slot_regions.append(
                 (
@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
@@ -14,6 +15,91 @@ from rich.console import Console
 from .devices import DeviceController
 from .debug import DebugReporter, get_debug_reporter
 
+# Dimension minima (en px) que debe conservar un template reducido para que el
+# pase grueso de la piramide siga siendo discriminativo.
+_PYRAMID_MIN_DIM = 12
+
+_TEMPLATE_PYRAMIDS: dict[Path, Optional[List[np.ndarray]]] = {}
+
+# Pool compartido para escanear varios templates en paralelo: matchTemplate
+# libera el GIL, por lo que los hilos escalan casi linealmente en multicore.
+_TEMPLATE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tmpl-match")
+
+# Hilo unico para capturas adelantadas durante las pausas de sondeo: el
+# screencap ADB corre en paralelo al sleep del hilo principal.
+_CAPTURE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-capture")
+
+
+def dhash64(image: np.ndarray) -> int:
+    """dHash de 64 bits (gradiente horizontal 8x8) de un recorte BGR o gris.
+
+    Dos recortes de la misma zona de pantalla difieren en pocos bits si el
+    contenido no cambió; comparar con XOR + popcount cuesta nanosegundos
+    frente a un pase de NCC.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _load_template_pyramid(template_path: Path) -> Optional[List[np.ndarray]]:
+    """Carga un template en gris junto con sus reducciones ``cv2.pyrDown``.
+
+    Args:
+        template_path (Path): Ruta absoluta al template.
+
+    Returns:
+        Optional[List[np.ndarray]]: Lista ``[full, /2, /4]`` en escala de grises
+        o ``None`` si el archivo no existe o no se pudo decodificar.
+    """
+    if template_path in _TEMPLATE_PYRAMIDS:
+        return _TEMPLATE_PYRAMIDS[template_path]
+    pyramid: Optional[List[np.ndarray]] = None
+    if template_path.exists():
+        template = cv2.imread(str(template_path), cv2.IMREAD_GRAYSCALE)
+        if template is not None:
+            pyramid = [template]
+            for _ in range(2):
+                pyramid.append(cv2.pyrDown(pyramid[-1]))
+    _TEMPLATE_PYRAMIDS[template_path] = pyramid
+    return pyramid
+
+
+_TEMPLATE_BGR: dict[Path, Optional[np.ndarray]] = {}
+
+
+def _load_template_bgr(template_path: Path) -> Optional[np.ndarray]:
+    """Carga (una sola vez) un template BGR desde disco.
+
+    Los sondeos repiten los mismos templates cada pocos cientos de ms; cachear
+    el decode evita un ``imread`` PNG por poll.
+
+    Args:
+        template_path (Path): Ruta absoluta al template.
+
+    Returns:
+        Optional[np.ndarray]: Imagen BGR o ``None`` si no existe o no decodifica.
+    """
+    if template_path in _TEMPLATE_BGR:
+        return _TEMPLATE_BGR[template_path]
+    template: Optional[np.ndarray] = None
+    if template_path.exists():
+        template = cv2.imread(str(template_path), cv2.IMREAD_COLOR)
+    _TEMPLATE_BGR[template_path] = template
+    return template
+
+
+def warm_template_cache(template_paths: Sequence[Path]) -> None:
+    """Pre-decodifica templates a los caches en gris y BGR.
+
+    Permite pagar el ``imread`` + ``pyrDown`` al construir la config de una
+    tarea en vez de en el primer sondeo del ciclo caliente.
+    """
+    for template_path in template_paths:
+        _load_template_pyramid(template_path)
+        _load_template_bgr(template_path)
+
 
 @dataclass
 class VisionHelper:
@@ -21,6 +107,20 @@ class VisionHelper:
     console: Console
     farm_name: str | None = None
     debug_reporter: DebugReporter | None = None
+    _last_frame: np.ndarray | None = field(default=None, repr=False)
+    _last_frame_at: float | None = field(default=None, repr=False)
+    # Resultados negativos de find_any_template para el frame actual: mientras
+    # los pixeles sean identicos, un grupo que ya fallo no se vuelve a matchear.
+    _neg_frame: np.ndarray | None = field(default=None, repr=False)
+    _neg_misses: set = field(default_factory=set, repr=False)
+    # Estimacion (EMA) del costo de un screencap, usada para adelantar la
+    # captura en segundo plano justo lo necesario durante las esperas.
+    _capture_ema: float = field(default=0.08, repr=False)
+    # Planos derivados del frame (gris y media resolucion) memoizados por
+    # identidad: sondas distintas sobre la misma captura comparten el cvtColor.
+    _plane_frame: np.ndarray | None = field(default=None, repr=False)
+    _plane_gray: np.ndarray | None = field(default=None, repr=False)
+    _plane_gray_half: np.ndarray | None = field(default=None, repr=False)
 
     """Encapsula capturas y busquedas de templates asociadas a un dispositivo.
 
@@ -40,6 +140,63 @@ class VisionHelper:
             return None
         array = np.frombuffer(buffer, dtype=np.uint8)
         image = cv2.imdecode(array, cv2.IMREAD_COLOR)
+        if image is not None:
+            self._last_frame = image
+            self._last_frame_at = time.monotonic()
+        return image
+
+    @property
+    def last_frame(self) -> Optional[np.ndarray]:
+        """Ultima captura decodificada correctamente, si existe."""
+        return self._last_frame
+
+    def last_frame_age_ms(self) -> Optional[float]:
+        """Edad en milisegundos de la ultima captura o ``None`` si no hay ninguna.
+
+        Returns:
+            Optional[float]: Milisegundos transcurridos desde la ultima captura.
+        """
+        if self._last_frame_at is None:
+            return None
+        return (time.monotonic() - self._last_frame_at) * 1000.0
+
+    def _delayed_capture(self, delay: float) -> Optional[np.ndarray]:
+        """Duerme ``delay`` segundos y captura; pensado para el pool de captura.
+
+        El retardo se calcula como ``pausa - _capture_ema`` para que el frame
+        quede listo justo cuando el hilo principal despierta, sin perder
+        frescura respecto a capturar al despertar.
+        """
+        if delay > 0:
+            time.sleep(delay)
+        started = time.monotonic()
+        frame = self.capture()
+        if frame is not None:
+            cost = time.monotonic() - started
+            self._capture_ema = 0.8 * self._capture_ema + 0.2 * cost
+        return frame
+
+    def capture_into(self, out: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Captura reutilizando un buffer preasignado cuando las formas coinciden.
+
+        ``cv2.imdecode`` siempre asigna su propia salida, por lo que esto no
+        elimina esa asignación; lo que garantiza es una identidad de buffer
+        estable para el llamador (las vistas/slices sobre ``out`` siguen
+        siendo válidas entre ticks) copiando el frame decodificado encima.
+
+        Args:
+            out (Optional[np.ndarray]): Buffer previo o ``None`` en el primer uso.
+
+        Returns:
+            Optional[np.ndarray]: ``out`` actualizado, un buffer nuevo si la
+            resolución cambió, o ``None`` si no hubo captura.
+        """
+        image = self.capture()
+        if image is None:
+            return None
+        if out is not None and out.shape == image.shape and out.dtype == image.dtype:
+            np.copyto(out, image)
+            return out
         return image
 
     def capture_for_debug(self, reason: str) -> Optional[np.ndarray]:
@@ -85,6 +242,8 @@ class VisionHelper:
         template_paths: Sequence[Path],
         threshold: float = 0.85,
         save_debug: bool = False,
+        image: Optional[np.ndarray] = None,
+        roi: Optional[Tuple[int, int, int, int]] = None,
     ) -> Optional[Tuple[Tuple[int, int], Path]]:
         """Busca el primer template que haga match sobre una captura.
 
@@ -92,6 +251,12 @@ class VisionHelper:
             template_paths (Sequence[Path]): Lista de rutas a examinar.
             threshold (float, optional): Coincidencia minima.
             save_debug (bool, optional): Si ``True`` persiste imagen con rectangulo.
+            image (Optional[np.ndarray], optional): Captura BGR reutilizable; si se
+                omite se toma una captura nueva.
+            roi (Optional[Tuple[int, int, int, int]], optional): Region
+                ``(x, y, w, h)`` donde acotar la busqueda; el NCC corre solo
+                sobre ese recorte y las coordenadas devueltas siguen siendo
+                absolutas.
 
         Returns:
             Optional[Tuple[Tuple[int, int], Path]]: Par con coordenadas y template
@@ -101,33 +266,85 @@ class VisionHelper:
         if not paths:
             return None
 
-        screenshot = self.capture()
+        screenshot = image if image is not None else self.capture()
         if screenshot is None:
             return None
 
-        for template_path in paths:
-            if not template_path.exists():
-                self.console.log(
-                    f"[warning] Template no encontrado: {template_path}"
-                )
-                continue
+        # Si la pantalla no cambio desde el ultimo sondeo, un grupo que ya dio
+        # negativo volveria a dar negativo: se omite el NCC. La comparacion es
+        # exacta (identidad o igualdad pixel a pixel): un hash perceptual puede
+        # absorber la aparicion de un icono chico y dejar el memo ciego justo
+        # al template que la espera sondea.
+        same_frame = self._neg_frame is not None and (
+            screenshot is self._neg_frame
+            or np.array_equal(screenshot, self._neg_frame)
+        )
+        if not same_frame:
+            self._neg_frame = screenshot
+            self._neg_misses.clear()
+        miss_key = (tuple(paths), threshold, roi)
+        if miss_key in self._neg_misses:
+            return None
 
-            template = cv2.imread(str(template_path), cv2.IMREAD_COLOR)
-            if template is None:
-                self.console.log(
-                    f"[warning] No se pudo leer template {template_path}"
-                )
-                continue
+        frame = screenshot
+        offset_x = offset_y = 0
+        if roi is not None:
+            rx, ry, rw, rh = roi
+            x0 = max(int(rx), 0)
+            y0 = max(int(ry), 0)
+            x1 = min(int(rx + rw), screenshot.shape[1])
+            y1 = min(int(ry + rh), screenshot.shape[0])
+            if x1 - x0 <= 0 or y1 - y0 <= 0:
+                return None
+            screenshot = screenshot[y0:y1, x0:x1]
+            offset_x, offset_y = x0, y0
 
-            result = cv2.matchTemplate(
-                screenshot, template, cv2.TM_CCOEFF_NORMED
+        gray_full = self._gray_plane(frame)
+        if roi is not None:
+            gray = gray_full[y0:y1, x0:x1]
+            gray_half = cv2.pyrDown(gray)
+        else:
+            gray = gray_full
+            if self._plane_gray_half is None:
+                self._plane_gray_half = cv2.pyrDown(gray)
+            gray_half = self._plane_gray_half
+        # El template de mayor prioridad se evalúa solo: si acierta (el caso
+        # común en sondeos encadenados), el resto de la lista ni se ejecuta.
+        first = self._score_single_template(
+            screenshot, paths[0], gray, gray_half, threshold
+        )
+        if len(paths) == 1 or (first is not None and first[0] >= threshold):
+            paths = paths[:1]
+            scores = [first]
+        else:
+            # matchTemplate suelta el GIL, así que los templates restantes se
+            # evalúan en paralelo; el primer hit se elige en orden de lista
+            # para conservar la prioridad original. Apilar los templates en
+            # una sola llamada no aplica acá: concatenarlos genera ventanas
+            # falsas que cruzan los bordes de cada mosaico, y la variante de
+            # correlación con FFT compartida solo amortiza con muchos
+            # templates del mismo tamaño (ver _ncc_via_frame_fft en la tarea
+            # de investigación, que sí cumple esa condición).
+            scores = [first] + list(
+                _TEMPLATE_POOL.map(
+                    lambda path: self._score_single_template(
+                        screenshot, path, gray, gray_half, threshold
+                    ),
+                    paths[1:],
+                )
             )
-            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+
+        for template_path, outcome in zip(paths, scores):
+            if outcome is None:
+                continue
+            max_val, max_loc, (h, w) = outcome
             if max_val < threshold:
                 continue
 
-            h, w = template.shape[:2]
-            center = (int(max_loc[0] + w / 2), int(max_loc[1] + h / 2))
+            center = (
+                offset_x + int(max_loc[0] + w / 2),
+                offset_y + int(max_loc[1] + h / 2),
+            )
             self._record_debug_frame(screenshot, f"find-{template_path.stem}")
             if save_debug:
                 debug_img = screenshot.copy()
@@ -144,8 +361,271 @@ class VisionHelper:
                 cv2.imwrite(str(out_path / filename), debug_img)
             return center, template_path
 
+        self._neg_misses.add(miss_key)
+        return None
+
+    def _gray_plane(self, frame: np.ndarray) -> np.ndarray:
+        """Conversion a gris memoizada por identidad del frame.
+
+        Un mismo tick suele sondear varios grupos de templates (menu, boton
+        de marcha, icono) sobre la misma captura; compartir el plano gris
+        evita repetir ``cvtColor`` sobre un frame de 960x540+ por grupo.
+
+        Args:
+            frame (np.ndarray): Captura BGR completa.
+
+        Returns:
+            np.ndarray: Plano gris del frame, reutilizado mientras el frame
+            sea el mismo objeto.
+        """
+        if frame is not self._plane_frame:
+            self._plane_frame = frame
+            self._plane_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            self._plane_gray_half = None
+        return self._plane_gray
+
+    def _score_single_template(
+        self,
+        screenshot: np.ndarray,
+        template_path: Path,
+        gray: Optional[np.ndarray] = None,
+        gray_half: Optional[np.ndarray] = None,
+        threshold: Optional[float] = None,
+    ) -> Optional[Tuple[float, Tuple[int, int], Tuple[int, int]]]:
+        """Evalúa un template y devuelve ``(max_val, max_loc, (h, w))``.
+
+        Args:
+            screenshot (np.ndarray): Captura BGR ya tomada.
+            template_path (Path): Ruta al template a puntuar.
+            gray (Optional[np.ndarray]): Captura en gris ya convertida; habilita
+                el descarte barato por NCC monocanal antes del match BGR.
+            gray_half (Optional[np.ndarray]): ``pyrDown`` de la captura en gris;
+                permite que el pase grueso corra a media resolución.
+            threshold (Optional[float]): Umbral del llamador, usado solo para el
+                descarte temprano.
+
+        Returns:
+            Optional[Tuple[float, Tuple[int, int], Tuple[int, int]]]: Puntaje,
+            ubicación y dimensiones, o ``None`` si el template no se pudo leer.
+        """
+        if not template_path.exists():
+            self.console.log(
+                f"[warning] Template no encontrado: {template_path}"
+            )
+            return None
+
+        # Prefiltro piramidal: el pase grueso corre en gris y, si el template
+        # lo permite, a media resolución (NCC ~12x más barato que el BGR
+        # completo). Se aplica con holgura para no perder matches que dependan
+        # del color o del detalle fino; los sobrevivientes se refinan en BGR.
+        # Tanto el pase grueso como el refinamiento operan sobre uint8, el
+        # formato donde matchTemplate despacha sus kernels SIMD; se mantiene
+        # TM_CCOEFF_NORMED porque los umbrales de todas las tareas están
+        # calibrados contra ese puntaje (CCORR_NORMED no es invariante a la
+        # media y los desplazaría).
+        if gray is not None and threshold is not None:
+            pyramid = _load_template_pyramid(template_path)
+            if pyramid is not None:
+                level = 0
+                source = gray
+                if (
+                    gray_half is not None
+                    and min(pyramid[1].shape[:2]) >= _PYRAMID_MIN_DIM
+                    and pyramid[1].shape[0] <= gray_half.shape[0]
+                    and pyramid[1].shape[1] <= gray_half.shape[1]
+                ):
+                    level = 1
+                    source = gray_half
+                if (
+                    pyramid[level].shape[0] <= source.shape[0]
+                    and pyramid[level].shape[1] <= source.shape[1]
+                ):
+                    coarse = cv2.matchTemplate(
+                        source, pyramid[level], cv2.TM_CCOEFF_NORMED
+                    )
+                    _, coarse_val, _, coarse_loc = cv2.minMaxLoc(coarse)
+                    scale = 1 << level
+                    if coarse_val < threshold - 0.05:
+                        h, w = pyramid[0].shape[:2]
+                        return (
+                            float(coarse_val),
+                            (int(coarse_loc[0]) * scale, int(coarse_loc[1]) * scale),
+                            (h, w),
+                        )
+                    if level == 1:
+                        # Refinamiento BGR acotado a una ventana alrededor del
+                        # pico grueso en vez del frame completo.
+                        template = _load_template_bgr(template_path)
+                        if template is None:
+                            self.console.log(
+                                f"[warning] No se pudo leer template {template_path}"
+                            )
+                            return None
+                        h, w = template.shape[:2]
+                        margin = 2 * scale + 2
+                        x0 = max(coarse_loc[0] * scale - margin, 0)
+                        y0 = max(coarse_loc[1] * scale - margin, 0)
+                        x1 = min(coarse_loc[0] * scale + w + margin, screenshot.shape[1])
+                        y1 = min(coarse_loc[1] * scale + h + margin, screenshot.shape[0])
+                        window = screenshot[y0:y1, x0:x1]
+                        if window.shape[0] >= h and window.shape[1] >= w:
+                            result = cv2.matchTemplate(
+                                window, template, cv2.TM_CCOEFF_NORMED
+                            )
+                            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+                            return (
+                                float(max_val),
+                                (x0 + int(max_loc[0]), y0 + int(max_loc[1])),
+                                (h, w),
+                            )
+
+        template = _load_template_bgr(template_path)
+        if template is None:
+            self.console.log(
+                f"[warning] No se pudo leer template {template_path}"
+            )
+            return None
+
+        result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        h, w = template.shape[:2]
+        return float(max_val), (int(max_loc[0]), int(max_loc[1])), (h, w)
+
+    def find_any_template_pyramid(
+        self,
+        template_paths: Sequence[Path],
+        threshold: float = 0.85,
+        image: Optional[np.ndarray] = None,
+    ) -> Optional[Tuple[Tuple[int, int], Path]]:
+        """Busca templates con una piramide gruesa-a-fina en escala de grises.
+
+        Reduce el frame 2x y 4x con ``cv2.pyrDown``, evalua cada template en el
+        nivel mas profundo donde conserva tamano util y solo refina a resolucion
+        completa en un vecindario pequeno alrededor del candidato. El pase
+        grueso toca ~1/16 de los pixeles, por lo que conviene para sondeos
+        frecuentes de paneles e iconos.
+
+        Args:
+            template_paths (Sequence[Path]): Lista de rutas a examinar.
+            threshold (float, optional): Coincidencia minima a resolucion completa.
+            image (Optional[np.ndarray], optional): Captura BGR reutilizable.
+
+        Returns:
+            Optional[Tuple[Tuple[int, int], Path]]: Par con coordenadas y template
+            que coincidio; ``None`` si ninguno supero el umbral.
+        """
+        paths = list(template_paths)
+        if not paths:
+            return None
+
+        screenshot = image if image is not None else self.capture()
+        if screenshot is None:
+            return None
+
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        frame_pyramid = [gray]
+        for _ in range(2):
+            frame_pyramid.append(cv2.pyrDown(frame_pyramid[-1]))
+
+        for template_path in paths:
+            pyramid = _load_template_pyramid(template_path)
+            if pyramid is None:
+                self.console.log(
+                    f"[warning] Template no encontrado: {template_path}"
+                )
+                continue
+
+            level = 0
+            for candidate in range(len(pyramid) - 1, 0, -1):
+                if min(pyramid[candidate].shape[:2]) >= _PYRAMID_MIN_DIM:
+                    level = candidate
+                    break
+
+            coarse = cv2.matchTemplate(
+                frame_pyramid[level], pyramid[level], cv2.TM_CCOEFF_NORMED
+            )
+            _, max_val, _, max_loc = cv2.minMaxLoc(coarse)
+            if level == 0:
+                if max_val < threshold:
+                    continue
+                h, w = pyramid[0].shape[:2]
+                center = (int(max_loc[0] + w / 2), int(max_loc[1] + h / 2))
+                self._record_debug_frame(screenshot, f"find-{template_path.stem}")
+                return center, template_path
+
+            # El pase grueso usa un umbral relajado; el veredicto final lo da
+            # el refinamiento a resolucion completa.
+            if max_val < threshold * 0.9:
+                continue
+
+            scale = 1 << level
+            h, w = pyramid[0].shape[:2]
+            margin = 2 * scale + 2
+            x0 = max(max_loc[0] * scale - margin, 0)
+            y0 = max(max_loc[1] * scale - margin, 0)
+            x1 = min(max_loc[0] * scale + w + margin, gray.shape[1])
+            y1 = min(max_loc[1] * scale + h + margin, gray.shape[0])
+            window = gray[y0:y1, x0:x1]
+            if window.shape[0] < h or window.shape[1] < w:
+                continue
+            refined = cv2.matchTemplate(window, pyramid[0], cv2.TM_CCOEFF_NORMED)
+            _, ref_val, _, ref_loc = cv2.minMaxLoc(refined)
+            if ref_val < threshold:
+                continue
+            center = (int(x0 + ref_loc[0] + w / 2), int(y0 + ref_loc[1] + h / 2))
+            self._record_debug_frame(screenshot, f"find-{template_path.stem}")
+            return center, template_path
+
         return None
 
+    def has_any_template(
+        self,
+        template_paths: Sequence[Path],
+        threshold: float = 0.85,
+        image: Optional[np.ndarray] = None,
+    ) -> bool:
+        """Responde si/no sobre el frame en escala de grises, sin coordenadas.
+
+        Para sondeos booleanos de botones el ahorro esta en correr sobre un
+        solo canal; la metrica sigue siendo TM_CCOEFF_NORMED porque los
+        umbrales configurados estan calibrados contra ese puntaje (una
+        equivalencia con SQDIFF_NORMED no existe: normaliza distinto y no es
+        invariante a la media).
+
+        Args:
+            template_paths (Sequence[Path]): Lista de rutas a examinar.
+            threshold (float, optional): Coincidencia minima.
+            image (Optional[np.ndarray], optional): Captura BGR reutilizable.
+
+        Returns:
+            bool: ``True`` si algun template aparece en pantalla.
+        """
+        paths = list(template_paths)
+        if not paths:
+            return False
+
+        screenshot = image if image is not None else self.capture()
+        if screenshot is None:
+            return False
+
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        for template_path in paths:
+            pyramid = _load_template_pyramid(template_path)
+            if pyramid is None:
+                self.console.log(
+                    f"[warning] Template no encontrado: {template_path}"
+                )
+                continue
+            template = pyramid[0]
+            if template.shape[0] > gray.shape[0] or template.shape[1] > gray.shape[1]:
+                continue
+            result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, _ = cv2.minMaxLoc(result)
+            if max_val >= threshold:
+                self._record_debug_frame(screenshot, f"has-{template_path.stem}")
+                return True
+        return False
+
     def find_all_templates(
         self,
         template_paths: Sequence[Path],
@@ -178,7 +658,7 @@ class VisionHelper:
                 )
                 continue
 
-            template = cv2.imread(str(template_path), cv2.IMREAD_COLOR)
+            template = _load_template_bgr(template_path)
             if template is None:
                 self.console.log(
                     f"[warning] No se pudo leer template {template_path}"
@@ -232,7 +712,7 @@ class VisionHelper:
             if not template_path.exists():
                 self.console.log(f"[warning] Template no encontrado: {template_path}")
                 continue
-            template = cv2.imread(str(template_path), cv2.IMREAD_COLOR)
+            template = _load_template_bgr(template_path)
             if template is None:
                 self.console.log(f"[warning] No se pudo leer template {template_path}")
                 continue
@@ -285,23 +765,55 @@ class VisionHelper:
     def average_brightness(
         self,
         region: tuple[tuple[float, float], tuple[float, float]] | None = None,
+        stride: int = 1,
+        max_age: float | None = None,
     ) -> Optional[float]:
         """Devuelve el brillo promedio normalizado (0-1) de la captura.
 
         Args:
             region (tuple[tuple[float, float], tuple[float, float]] | None):
                 Coordenadas relativas ((y1, y2), (x1, x2)). ``None`` usa toda la imagen.
+            stride (int, optional): Submuestreo espacial; ``stride=4`` toca
+                1/16 de los pixeles con un promedio casi identico en imagenes
+                naturales, util para chequeos frecuentes de overlay.
+            max_age (float | None, optional): Si la ultima captura tiene menos
+                de este numero de segundos, se reutiliza en lugar de pedir un
+                screencap nuevo (que domina el costo del chequeo).
 
         Returns:
             Optional[float]: Brillo promedio en escala 0-1 o ``None`` si no hubo captura.
         """
 
-        screenshot = self.capture()
+        value = self.average_brightness_u8(region=region, stride=stride, max_age=max_age)
+        if value is None:
+            return None
+        return float(value) / 255.0
+
+    def average_brightness_u8(
+        self,
+        region: tuple[tuple[float, float], tuple[float, float]] | None = None,
+        stride: int = 1,
+        max_age: float | None = None,
+    ) -> Optional[int]:
+        """Brillo promedio en escala uint8 (0-255), sin conversion a float.
+
+        Recorta y submuestrea antes de convertir a gris, de modo que
+        ``cvtColor`` solo toca los pixeles que realmente se promedian; el
+        resultado entero permite comparar contra umbrales precalculados.
+        """
+
+        screenshot: Optional[np.ndarray] = None
+        if max_age is not None:
+            age_ms = self.last_frame_age_ms()
+            if age_ms is not None and age_ms <= max_age * 1000.0:
+                screenshot = self._last_frame
+        if screenshot is None:
+            screenshot = self.capture()
         if screenshot is None:
             return None
 
-        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        h, w = gray.shape
+        h, w = screenshot.shape[:2]
+        sub = screenshot
         if region:
             (y_start, y_end), (x_start, x_end) = region
             y1 = max(int(h * y_start), 0)
@@ -309,10 +821,13 @@ class VisionHelper:
             x1 = max(int(w * x_start), 0)
             x2 = min(int(w * x_end), w)
             if y2 > y1 and x2 > x1:
-                gray = gray[y1:y2, x1:x2]
+                sub = sub[y1:y2, x1:x2]
 
-        brightness = float(gray.mean()) / 255.0
-        return brightness
+        if stride > 1:
+            sub = np.ascontiguousarray(sub[::stride, ::stride])
+
+        gray = cv2.cvtColor(sub, cv2.COLOR_BGR2GRAY)
+        return int(cv2.mean(gray)[0])
 
     def _record_debug_frame(self, image: np.ndarray, reason: str | None = None) -> None:
         """Entrega la captura al reporter si hay contexto para depurar.
@@ -401,6 +916,8 @@ class VisionHelper:
         poll_interval: float = 2.0,
         threshold: float = 0.85,
         raise_on_timeout: bool = True,
+        poll_schedule: Optional[Sequence[float]] = None,
+        roi: Optional[Tuple[int, int, int, int]] = None,
     ) -> Optional[Tuple[Tuple[int, int], Path]]:
         """Espera hasta que alguno de los templates aparezca.
 
@@ -410,6 +927,14 @@ class VisionHelper:
             poll_interval (float, optional): Pausa entre intentos.
             threshold (float, optional): Coincidencia minima por template.
             raise_on_timeout (bool, optional): Controla si se lanza ``TimeoutError``.
+            poll_schedule (Optional[Sequence[float]], optional): Pausas
+                crecientes para los primeros sondeos (p. ej. ``(0.1, 0.15,
+                0.25, 0.4)``); agotada la secuencia se repite el ultimo valor.
+                La mayoria de las esperas resuelve en el primer o segundo
+                intento, asi que arrancar con pausas cortas recorta la latencia
+                sin subir el costo de las esperas largas.
+            roi (Optional[Tuple[int, int, int, int]], optional): Region
+                ``(x, y, w, h)`` donde acotar cada sondeo.
 
         Returns:
             Optional[Tuple[Tuple[int, int], Path]]: Coordenadas y template que coincidieron
@@ -422,14 +947,124 @@ class VisionHelper:
         if not paths:
             return None
 
+        # Esperas encadenadas (tap tras tap) llegan con un frame recien
+        # capturado por la llamada anterior: el primer sondeo lo reutiliza si
+        # tiene menos de 50 ms, ahorrando un screencap + decode.
+        age_ms = self.last_frame_age_ms()
+        recent = self._last_frame if age_ms is not None and age_ms <= 50 else None
+        schedule = iter(poll_schedule) if poll_schedule else None
+        pending = None
         start = time.monotonic()
         while time.monotonic() - start <= timeout:
-            coords = self.find_any_template(paths, threshold=threshold)
+            if pending is not None:
+                frame = pending.result()
+                pending = None
+                if frame is not None:
+                    recent = frame
+            coords = self.find_any_template(
+                paths, threshold=threshold, image=recent, roi=roi
+            )
+            recent = None
             if coords:
                 return coords
-            time.sleep(poll_interval)
+            if schedule is not None:
+                pause = next(schedule, poll_schedule[-1])
+            else:
+                pause = poll_interval
+            # Solapa el screencap con la pausa: la captura arranca en segundo
+            # plano con el retardo justo para terminar al despertar, asi el
+            # siguiente sondeo no paga el costo del ADB screencap.
+            pending = _CAPTURE_POOL.submit(
+                self._delayed_capture, max(pause - self._capture_ema, 0.0)
+            )
+            time.sleep(pause)
+        if pending is not None:
+            pending.result()
         if raise_on_timeout:
             raise TimeoutError(
                 f"Templates {[path.name for path in paths]} no aparecieron en {timeout}s"
             )
         return None
+
+    def find_best_of_groups(
+        self,
+        groups: Sequence[Sequence[Path]],
+        thresholds: Sequence[float],
+        image: Optional[np.ndarray] = None,
+    ) -> List[Optional[Tuple[Tuple[int, int], Path]]]:
+        """Evalua varios grupos de templates contra una unica captura.
+
+        A diferencia de :meth:`match_groups` (que sondea hasta que un grupo
+        aparezca), aqui se examina cada grupo exactamente una vez sobre el
+        mismo frame y se devuelve el resultado de todos, de modo que un lazo
+        que probaria N grupos por separado paga un solo screencap.
+
+        Args:
+            groups (Sequence[Sequence[Path]]): Listas de templates por grupo;
+                un grupo vacio produce ``None`` en su posicion.
+            thresholds (Sequence[float]): Umbral por grupo, alineado con
+                ``groups``.
+            image (Optional[np.ndarray], optional): Frame BGR reutilizable.
+
+        Returns:
+            List[Optional[Tuple[Tuple[int, int], Path]]]: Resultado de
+            ``find_any_template`` por grupo, en el mismo orden de entrada.
+        """
+        results: List[Optional[Tuple[Tuple[int, int], Path]]] = [None] * len(groups)
+        screenshot = image if image is not None else self.capture()
+        if screenshot is None:
+            return results
+        for index, (paths, threshold) in enumerate(zip(groups, thresholds)):
+            if not paths:
+                continue
+            results[index] = self.find_any_template(
+                list(paths), threshold=threshold, image=screenshot
+            )
+        return results
+
+    def match_groups(
+        self,
+        mapping: Dict[str, Sequence[Path]],
+        threshold: float = 0.85,
+        timeout: float = 0.0,
+        poll_interval: float = 0.5,
+        thresholds: Dict[str, float] | None = None,
+    ) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """Sondea varios grupos de templates con una sola captura por intento.
+
+        Cuando dos esperas corren sobre la misma pantalla (p. ej. tienda de
+        badges vs. panel de recursos) sondearlas por separado paga un
+        screencap por grupo; aqui cada iteracion captura un frame y prueba
+        todos los grupos contra el, en el orden del ``mapping``.
+
+        Args:
+            mapping (Dict[str, Sequence[Path]]): Grupos etiquetados de templates.
+            threshold (float, optional): Umbral por defecto para todos los grupos.
+            timeout (float, optional): Segundos maximos de sondeo; ``0`` hace
+                un unico intento.
+            poll_interval (float, optional): Pausa entre intentos.
+            thresholds (Dict[str, float] | None, optional): Umbral especifico
+                por grupo, con prioridad sobre ``threshold``.
+
+        Returns:
+            Optional[Tuple[str, Tuple[int, int]]]: Nombre del grupo que
+            coincidio y coordenadas del match, o ``None`` si se agoto el tiempo.
+        """
+        groups = [(name, list(paths)) for name, paths in mapping.items() if paths]
+        if not groups:
+            return None
+
+        start = time.monotonic()
+        while True:
+            frame = self.capture()
+            if frame is not None:
+                for name, paths in groups:
+                    group_threshold = (thresholds or {}).get(name, threshold)
+                    found = self.find_any_template(
+                        paths, threshold=group_threshold, image=frame
+                    )
+                    if found:
+                        return name, found[0]
+            if time.monotonic() - start >= timeout:
+                return None
+            time.sleep(poll_interval)